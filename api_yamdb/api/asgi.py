@@ -0,0 +1,171 @@
+"""
+Обслуживание через ASGI-сервер (uvicorn).
+
+В Django 2.2 нет асинхронных представлений, поэтому запрос
+обрабатывает WSGI-приложение в ограниченном пуле потоков, а приём
+тела запроса и отправка ответа идут в цикле событий: медленный клиент
+занимает сопрограмму, а не поток с соединением с базой. Чтения
+из READ_ROUTES выполняются в отдельном пуле, чтобы запись и прочие
+запросы их не вытесняли. Потоковые ответы отдаются из потока
+по мере чтения клиентом.
+"""
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.urls import Resolver404, resolve
+
+from api_yamdb.settings import ASGI_READ_THREADS, ASGI_THREADS
+
+READ_ROUTES = frozenset((
+    'titles-list', 'titles-detail',
+    'genres-list',
+    'categories-list',
+    'reviews-list', 'reviews-detail',
+    'comments-list', 'comments-detail',
+))
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def build_environ(scope, body):
+    """WSGI-окружение из ASGI scope."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # PEP 3333: строки окружения — байты в latin-1.
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': 'HTTP/{}'.format(scope.get('http_version', '1.1')),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+def is_read(scope):
+    if scope['method'] not in READ_METHODS:
+        return False
+    try:
+        return resolve(scope['path']).url_name in READ_ROUTES
+    except Resolver404:
+        return False
+
+
+class ASGIHandler:
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+        self.read_executor = ThreadPoolExecutor(
+            ASGI_READ_THREADS, thread_name_prefix='asgi-read'
+        )
+        self.executor = ThreadPoolExecutor(
+            ASGI_THREADS, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(
+                f"Тип соединения {scope['type']} не поддерживается."
+            )
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_event_loop()
+        response = await loop.run_in_executor(
+            self.read_executor if is_read(scope) else self.executor,
+            self.handle, scope, body, loop, send
+        )
+        if response is None:
+            return
+        start, content = response
+        await send(start)
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.read_executor.shutdown(wait=False)
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса или None, если клиент отключился."""
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    def handle(self, scope, body, loop, send):
+        """
+        Выполняется в потоке пула. Обычный ответ возвращается целиком
+        для отправки из цикла событий; потоковый отправляется отсюда,
+        и поток ждёт, пока клиент примет очередную часть.
+        """
+        start = {}
+
+        def start_response(status, headers, exc_info=None):
+            start.update(
+                type='http.response.start',
+                status=int(status.split(' ', 1)[0]),
+                headers=[
+                    (name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in headers
+                ],
+            )
+
+        result = self.wsgi_application(
+            build_environ(scope, body), start_response
+        )
+        head = scope['method'] == 'HEAD'
+        # close() отправляет request_finished: Django закрывает
+        # соединения с базой этого потока.
+        try:
+            if not getattr(result, 'streaming', False):
+                content = b''.join(result)
+                return start, b'' if head else content
+            asyncio.run_coroutine_threadsafe(send(start), loop).result()
+            for chunk in () if head else result:
+                if chunk:
+                    asyncio.run_coroutine_threadsafe(send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    }), loop).result()
+            asyncio.run_coroutine_threadsafe(
+                send({'type': 'http.response.body'}), loop
+            ).result()
+            return None
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
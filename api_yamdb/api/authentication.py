@@ -0,0 +1,139 @@
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+
+from api_yamdb.settings import (API_CACHE_ALIAS, AUTH_CLAIMS_CACHE_SIZE,
+                                AUTH_CLAIMS_CACHE_TTL)
+
+from .cache import is_shared_cache
+
+# Поля пользователя, которые передаются в токене
+# и нужны правам доступа без обращения к базе.
+USER_CLAIMS = ('username', 'role', 'is_staff', 'is_superuser', 'is_active')
+
+CHANGED_KEY = 'auth:changed:{}'
+
+
+def access_token_for_user(user):
+    token = AccessToken.for_user(user)
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def mark_user_changed(user_id):
+    """
+    Отмечает, что роль или флаги пользователя изменились: выданные
+    раньше токены больше не считаются источником этих данных.
+    """
+    caches[API_CACHE_ALIAS].set(
+        CHANGED_KEY.format(user_id),
+        time.time(),
+        api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    )
+    user_states.pop(user_id)
+
+
+def load_full_user(user):
+    """Возвращает пользователя со всеми полями из базы."""
+    if user.get_deferred_fields():
+        return User.objects.get(pk=user.pk)
+    return user
+
+
+class TTLCache:
+    """Небольшой кэш процесса с ограниченным временем жизни записей."""
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) >= self.maxsize:
+                self._data.clear()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+# user_id -> (время изменения, состояние из базы или None)
+user_states = TTLCache(AUTH_CLAIMS_CACHE_TTL, AUTH_CLAIMS_CACHE_SIZE)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Строит пользователя из утверждений токена без запроса к базе.
+
+    Остальные поля пользователя отложены (deferred) и загружаются
+    только при обращении к ним. Если роль пользователя менялась после
+    выдачи токена, данные берутся из базы; сведения об изменениях
+    кэшируются в процессе на AUTH_CLAIMS_CACHE_TTL секунд.
+    Если кэш не общий для воркеров, отметки об изменениях из других
+    процессов не видны, и данные всегда берутся из базы — раз
+    в AUTH_CLAIMS_CACHE_TTL секунд.
+    Токены без утверждений обрабатываются как в JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        state = self.get_state(user_id, validated_token)
+        if not state['is_active']:
+            raise AuthenticationFailed(
+                'Пользователь неактивен.', code='user_inactive'
+            )
+        values = {claim: state[claim] for claim in USER_CLAIMS}
+        values['id'] = user_id
+        # from_db ожидает значения в порядке полей модели.
+        field_names = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in values
+        ]
+        return User.from_db(
+            DEFAULT_DB_ALIAS,
+            field_names,
+            [values[name] for name in field_names]
+        )
+
+    def get_state(self, user_id, validated_token):
+        cached = user_states.get(user_id)
+        if cached is None:
+            cache = caches[API_CACHE_ALIAS]
+            if is_shared_cache(cache):
+                changed_at = cache.get(CHANGED_KEY.format(user_id), 0)
+            else:
+                changed_at = float('inf')
+            cached = (changed_at, None)
+            user_states.set(user_id, cached)
+        changed_at, db_state = cached
+        if changed_at < validated_token['iat']:
+            return validated_token
+        if db_state is None:
+            db_state = User.objects.filter(pk=user_id).values(
+                *USER_CLAIMS
+            ).first()
+            if db_state is None:
+                raise AuthenticationFailed(
+                    'Пользователь не найден.', code='user_not_found'
+                )
+            user_states.set(user_id, (changed_at, db_state))
+        return db_state
@@ -0,0 +1,218 @@
+"""
+Пакетное создание произведений и отзывов.
+
+Элементы проверяются сериализаторами без обращений к базе, связанные
+объекты ищутся одним запросом IN на весь пакет, вставка — bulk_create
+в одной транзакции. Ошибки возвращаются по индексам элементов.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, connections, transaction
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from reviews.models import Category, Genre, Review, Title, TitleGenre
+from reviews.search import index_title
+from reviews.utils import change_score_count, update_title_rating
+from users.models import User
+
+from api_yamdb.settings import BULK_BATCH_SIZE, BULK_MAX_ITEMS
+
+from .signals import invalidate
+from .validators import validate_year
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+    year = serializers.IntegerField(validators=[validate_year])
+
+    class Meta:
+        fields = ('name', 'year', 'description', 'genre', 'category')
+        model = Title
+
+
+class ReviewBulkSerializer(serializers.ModelSerializer):
+    author = serializers.CharField()
+    score = serializers.IntegerField(min_value=1, max_value=10)
+
+    class Meta:
+        fields = ('author', 'text', 'score')
+        model = Review
+
+
+def validate_items(serializer_class, items):
+    """Список (индекс, данные) корректных элементов и словарь ошибок."""
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors[index] = serializer.errors
+    return valid, errors
+
+
+def insert(model, objects):
+    """
+    bulk_create, после которого у объектов есть id. Если база
+    не возвращает id из пакетной вставки (SQLite), строки
+    вставляются по одной. Сигналы post_save не отправляются.
+    """
+    using = model.objects.db
+    if connections[using].features.can_return_ids_from_bulk_insert:
+        return model.objects.bulk_create(objects, batch_size=BULK_BATCH_SIZE)
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field is not model._meta.auto_field
+    ]
+    for obj in objects:
+        obj.pk = model._base_manager._insert(
+            [obj], fields=fields, return_id=True, using=using
+        )
+    return objects
+
+
+def bulk_create_titles(items):
+    """Создаёт произведения; возвращает их id и ошибки по индексам."""
+    valid, errors = validate_items(TitleBulkSerializer, items)
+    genre_slugs = {slug for _, data in valid for slug in data['genre']}
+    category_slugs = {data['category'] for _, data in valid}
+    genres = dict(
+        Genre.objects.filter(slug__in=genre_slugs).values_list('slug', 'id')
+    )
+    categories = dict(
+        Category.objects.filter(
+            slug__in=category_slugs
+        ).values_list('slug', 'id')
+    )
+    titles, links = [], []
+    for index, data in valid:
+        item_errors = {}
+        unknown = [slug for slug in data['genre'] if slug not in genres]
+        if unknown:
+            item_errors['genre'] = [
+                f'Жанр {slug} не существует.' for slug in unknown
+            ]
+        if data['category'] not in categories:
+            item_errors['category'] = [
+                f"Категория {data['category']} не существует."
+            ]
+        if item_errors:
+            errors[index] = item_errors
+            continue
+        titles.append(Title(
+            name=data['name'],
+            year=data['year'],
+            description=data['description'],
+            category_id=categories[data['category']],
+        ))
+        links.append(dict.fromkeys(genres[slug] for slug in data['genre']))
+    if not titles:
+        return [], errors
+    with transaction.atomic():
+        insert(Title, titles)
+        TitleGenre.objects.bulk_create(
+            [
+                TitleGenre(title_id=title.pk, genre_id=genre_id)
+                for title, genre_ids in zip(titles, links)
+                for genre_id in genre_ids
+            ],
+            batch_size=BULK_BATCH_SIZE
+        )
+        for title in titles:
+            index_title(title, Title.objects.db)
+        invalidate('titles')
+    return [title.pk for title in titles], errors
+
+
+def bulk_create_reviews(title, items):
+    """
+    Создаёт отзывы на произведение от имени указанных авторов;
+    возвращает их id и ошибки по индексам.
+    """
+    valid, errors = validate_items(ReviewBulkSerializer, items)
+    usernames = {data['author'] for _, data in valid}
+    authors = dict(
+        User.objects.filter(username__in=usernames).values_list(
+            'username', 'id'
+        )
+    )
+    reviewed = set(
+        Review.objects.filter(
+            title=title, author_id__in=list(authors.values())
+        ).values_list('author_id', flat=True)
+    )
+    reviews = []
+    for index, data in valid:
+        author_id = authors.get(data['author'])
+        if author_id is None:
+            errors[index] = {
+                'author': [f"Пользователь {data['author']} не существует."]
+            }
+            continue
+        if author_id in reviewed:
+            errors[index] = {
+                'author': ['Пользователь уже оставил отзыв.']
+            }
+            continue
+        reviewed.add(author_id)
+        reviews.append(Review(
+            title=title,
+            author_id=author_id,
+            text=data['text'],
+            score=data['score'],
+        ))
+    if not reviews:
+        return [], errors
+    with transaction.atomic():
+        insert(Review, reviews)
+        # Сигналы при пакетной вставке не отправляются.
+        for score, count in Counter(
+            review.score for review in reviews
+        ).items():
+            change_score_count(title.pk, score, count)
+        update_title_rating(title.pk)
+        invalidate('titles')
+        invalidate('reviews', str(title.pk))
+    return [review.pk for review in reviews], errors
+
+
+def bulk_response(request, create):
+    """
+    Ответ пакетного создания: 201 — созданы все элементы,
+    207 — часть, 400 — ни одного.
+    """
+    items = request.data
+    if not isinstance(items, list) or not items:
+        return Response(
+            {'Ошибка': 'Ожидается непустой список объектов.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(items) > BULK_MAX_ITEMS:
+        return Response(
+            {'Ошибка': f'В пакете не больше {BULK_MAX_ITEMS} объектов.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        created, errors = create(items)
+    except IntegrityError:
+        return Response(
+            {'Ошибка': 'Пакет конфликтует с изменениями других запросов.'},
+            status=status.HTTP_409_CONFLICT
+        )
+    if not errors:
+        response_status = status.HTTP_201_CREATED
+    elif not created:
+        response_status = status.HTTP_400_BAD_REQUEST
+    else:
+        response_status = status.HTTP_207_MULTI_STATUS
+    return Response(
+        {
+            'created': created,
+            'errors': [
+                {'index': index, 'errors': item_errors}
+                for index, item_errors in sorted(errors.items())
+            ],
+        },
+        status=response_status
+    )
@@ -0,0 +1,202 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework import status
+from rest_framework.response import Response
+
+from api_yamdb.settings import API_CACHE_ALIAS, API_CACHE_TIMEOUT
+
+from .conditional import etag_matches
+from .routers import replica_alias
+
+KEY_PREFIX = 'api'
+
+# Версия, общая для всех ресурсов: её увеличивает bump_all_versions.
+ALL_RESOURCES = 'all'
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов кэша в текущем процессе."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def as_dict(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / total if total else None,
+        }
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[API_CACHE_ALIAS]
+
+
+def is_shared_cache(cache):
+    """Записи кэша видны всем воркерам, а не только этому процессу."""
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def version_key(resource, scope=None):
+    if scope is None:
+        return f'{KEY_PREFIX}:version:{resource}'
+    return f'{KEY_PREFIX}:version:{resource}:{scope}'
+
+
+def new_version():
+    # Если счётчик вытеснен из кэша, новое значение не совпадёт
+    # ни с одной из прежних версий.
+    return int(time.time() * 1000)
+
+
+def get_version(resource, scope=None):
+    cache = get_cache()
+    key = version_key(resource, scope)
+    version = cache.get(key)
+    if version is not None:
+        return version
+    version = new_version()
+    if cache.add(key, version, timeout=None):
+        return version
+    return cache.get(key, version)
+
+
+def bumped_key(resource, scope=None):
+    return version_key(resource, scope) + ':bumped'
+
+
+def bump_version(resource, scope=None):
+    cache = get_cache()
+    key = version_key(resource, scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_version(), timeout=None)
+    if settings.DB_REPLICAS:
+        cache.set(
+            bumped_key(resource, scope), True,
+            settings.DB_REPLICA_STICKY_SECONDS
+        )
+
+
+def bump_all_versions():
+    """Устаревают ответы всех ресурсов, например после импорта."""
+    bump_version(ALL_RESOURCES)
+
+
+def recently_bumped(resource, scope=None):
+    """
+    Версия менялась недавно: реплика ещё может отдавать старые данные,
+    и ответ, прочитанный из неё, не кэшируется.
+    """
+    return bool(get_cache().get_many(
+        [bumped_key(resource, scope), bumped_key(ALL_RESOURCES)]
+    ))
+
+
+def response_version(resource, scope=None):
+    """Общая версия и версия ресурса одним обращением к кэшу."""
+    keys = [version_key(ALL_RESOURCES), version_key(resource, scope)]
+    versions = get_cache().get_many(keys)
+    if len(versions) < len(keys):
+        versions = {
+            keys[0]: get_version(ALL_RESOURCES),
+            keys[1]: get_version(resource, scope),
+        }
+    return f'{versions[keys[0]]}.{versions[keys[1]]}'
+
+
+def response_cache_key(resource, scope, request):
+    query = sorted(
+        (name, sorted(values))
+        for name, values in request.query_params.lists()
+    )
+    digest = hashlib.md5(
+        f'{request.path}?{query}'.encode('utf-8')
+    ).hexdigest()
+    version = response_version(resource, scope)
+    return f'{KEY_PREFIX}:response:{resource}:{version}:{digest}'
+
+
+class CachedListMixin:
+    """
+    Кэширует ответы list по пути, параметрам запроса и версии ресурса.
+    Версию увеличивают сигналы из api.signals.
+
+    Вместе с данными хранится ETag ответа: стоящий после этого класса
+    ConditionalRequestMixin вызывается только при промахе, а при
+    попадании If-None-Match проверяется без обращения к базе.
+    """
+    cache_resource = None
+    cache_scope_kwarg = None
+
+    def get_cache_scope(self):
+        if self.cache_scope_kwarg is None:
+            return None
+        return self.kwargs.get(self.cache_scope_kwarg)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = response_cache_key(
+            self.cache_resource, self.get_cache_scope(), request
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            stats.hit()
+            data, etag = cached
+            header = request.META.get('HTTP_IF_NONE_MATCH')
+            if etag is not None and header is not None and etag_matches(
+                header, etag
+            ):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = Response(data)
+            if etag is not None:
+                response['ETag'] = etag
+            response['X-Cache'] = 'HIT'
+            return response
+        stats.miss()
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK and not (
+            replica_alias() and recently_bumped(
+                self.cache_resource, self.get_cache_scope()
+            )
+        ):
+            cache.set(
+                key, (response.data, response.get('ETag')), API_CACHE_TIMEOUT
+            )
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedListRetrieveMixin(CachedListMixin):
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
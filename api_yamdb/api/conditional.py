@@ -0,0 +1,124 @@
+import hashlib
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    return quote_etag(
+        hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+    )
+
+
+def etag_matches(header, etag):
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+class ConditionalRequestMixin:
+    """
+    ETag для list и retrieve, ответ 304 на If-None-Match
+    и 412 на несовпадающий If-Match при изменении объекта.
+
+    ETag списка строится по числу строк и максимальным id и updated
+    отфильтрованной выборки (кроме курсорного режима),
+    ETag объекта — по его полю updated. Изменения вложенных объектов
+    (категории, жанра, имени автора) тоже обновляют updated,
+    см. api.signals.touch.
+    Сериализатор при совпадении ETag не вызывается.
+    """
+    etag_version_field = 'updated'
+
+    def check_empty_list(self):
+        """Вызывается, если отфильтрованная выборка пуста."""
+
+    def get_list_etag(self):
+        paginator = self.paginator
+        if getattr(paginator, 'is_cursor_request', None) and (
+            paginator.is_cursor_request(self.request)
+        ):
+            # Курсорные страницы не считают строки всей выборки.
+            return None
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        state = queryset.aggregate(
+            count=Count('pk'),
+            max_id=Max('pk'),
+            max_version=Max(self.etag_version_field),
+        )
+        if not state['count']:
+            self.check_empty_list()
+        query = sorted(
+            (name, sorted(values))
+            for name, values in self.request.query_params.lists()
+        )
+        return make_etag(
+            self.basename, self.kwargs, query,
+            state['count'], state['max_id'], state['max_version']
+        )
+
+    def get_object_etag(self, lock=False):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset().filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        if lock:
+            queryset = queryset.select_for_update()
+        version = queryset.values_list(
+            self.etag_version_field, flat=True
+        ).first()
+        if version is None:
+            return None
+        return make_etag(self.basename, self.kwargs, version)
+
+    def not_modified(self, etag):
+        header = self.request.META.get('HTTP_IF_NONE_MATCH')
+        if etag is None or header is None or not etag_matches(header, etag):
+            return None
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+
+    def with_etag(self, response, etag):
+        if etag is not None and response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_list_etag()
+        return self.not_modified(etag) or self.with_etag(
+            super().list(request, *args, **kwargs), etag
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        etag = self.get_object_etag()
+        return self.not_modified(etag) or self.with_etag(
+            super().retrieve(request, *args, **kwargs), etag
+        )
+
+    def conditional_write(self, handler, request, *args, **kwargs):
+        header = request.META.get('HTTP_IF_MATCH')
+        if header is None:
+            return handler(request, *args, **kwargs)
+        with transaction.atomic():
+            # Строка блокируется до конца записи, чтобы между проверкой
+            # и сохранением её не изменил другой запрос.
+            etag = self.get_object_etag(lock=True)
+            if etag is not None and not etag_matches(header, etag):
+                return Response(
+                    {'detail': 'Объект был изменён другим запросом.'},
+                    status=status.HTTP_412_PRECONDITION_FAILED
+                )
+            return handler(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        return self.conditional_write(
+            super().update, request, *args, **kwargs
+        )
+
+    def destroy(self, request, *args, **kwargs):
+        return self.conditional_write(
+            super().destroy, request, *args, **kwargs
+        )
@@ -0,0 +1,52 @@
+"""
+Постоянные соединения с базой (CONN_MAX_AGE).
+
+Перед запросом соединение, простоявшее дольше DB_HEALTH_CHECK_IDLE
+секунд, проверяется: база или балансировщик могли закрыть его,
+и запрос упал бы с ошибкой. Открытые и повторно использованные
+соединения считаются в метриках; пул считает их сам.
+"""
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import registry
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    if not getattr(connection, 'pooled', False):
+        registry.increment('db_connections_opened_total', connection.alias)
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    # Выполняется после close_old_connections Django, которое уже
+    # закрыло соединения старше CONN_MAX_AGE.
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        last_used = getattr(connection, 'last_used', now)
+        if (
+            now - last_used >= settings.DB_HEALTH_CHECK_IDLE
+            and not connection.is_usable()
+        ):
+            connection.close()
+            continue
+        if not getattr(connection, 'pooled', False):
+            registry.increment(
+                'db_connections_reused_total', connection.alias
+            )
+
+
+@receiver(request_finished)
+def remember_last_used(**kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.last_used = now
@@ -1,14 +1,91 @@
 from django_filters import rest_framework as filter
-from django_filters.filters import CharFilter, NumberFilter
-from reviews.models import Title
+from django_filters.filters import CharFilter, ChoiceFilter, NumberFilter
+from rest_framework.filters import BaseFilterBackend
+from reviews.models import Category, Genre, Title, TitleGenre
+from reviews.search import search_titles
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+
+
+def split_slugs(value):
+    """'drama, comedy,drama' -> ('drama', 'comedy')"""
+    slugs = (slug.strip() for slug in value.split(','))
+    return tuple(dict.fromkeys(slug for slug in slugs if slug))
+
+
+def resolve_slugs(request, model, slugs):
+    """
+    Словарь slug -> id для найденных объектов. Результат хранится
+    в запросе: выборка фильтруется повторно для ETag и для ответа.
+    """
+    resolved = getattr(request, '_resolved_slugs', None)
+    if resolved is None:
+        resolved = request._resolved_slugs = {}
+    key = (model._meta.label, slugs)
+    if key not in resolved:
+        resolved[key] = dict(
+            model.objects.filter(slug__in=slugs).values_list('slug', 'id')
+        )
+    return resolved[key]
 
 
 class TitleFilter(filter.FilterSet):
+    """
+    ?genre= и ?category= принимают slug или несколько slug через
+    запятую. ?genre_match=all оставляет произведения, у которых
+    есть все перечисленные жанры, по умолчанию — хотя бы один.
+    """
     name = CharFilter(field_name='name', lookup_expr='icontains')
     year = NumberFilter(field_name='year', lookup_expr='exact')
-    category = CharFilter(field_name='category__slug', lookup_expr='icontains')
-    genre = CharFilter(field_name='genre__slug', lookup_expr='icontains')
+    category = CharFilter(method='filter_category')
+    genre = CharFilter(method='filter_genre')
+    genre_match = ChoiceFilter(
+        choices=((MATCH_ANY, MATCH_ANY), (MATCH_ALL, MATCH_ALL)),
+        method='filter_nothing'
+    )
 
     class Meta:
         model = Title
         fields = ('name', 'year', 'category', 'genre')
+
+    def filter_nothing(self, queryset, name, value):
+        return queryset
+
+    def filter_category(self, queryset, name, value):
+        slugs = split_slugs(value)
+        if not slugs:
+            return queryset
+        ids = resolve_slugs(self.request, Category, slugs)
+        return queryset.filter(category_id__in=list(ids.values()))
+
+    def filter_genre(self, queryset, name, value):
+        slugs = split_slugs(value)
+        if not slugs:
+            return queryset
+        ids = resolve_slugs(self.request, Genre, slugs)
+        # Подзапросы по индексу (genre, title) не размножают строки
+        # произведений, поэтому DISTINCT не нужен.
+        if self.form.cleaned_data.get('genre_match') == MATCH_ALL:
+            if len(ids) < len(slugs):
+                return queryset.none()
+            for genre_id in ids.values():
+                queryset = queryset.filter(pk__in=TitleGenre.objects.filter(
+                    genre_id=genre_id
+                ).values('title_id'))
+            return queryset
+        return queryset.filter(pk__in=TitleGenre.objects.filter(
+            genre_id__in=list(ids.values())
+        ).values('title_id'))
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """
+    Поиск ?search= по названию и описанию с сортировкой
+    по релевантности.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        return search_titles(queryset, query)
@@ -0,0 +1,53 @@
+import os
+
+from api.export import CSV, EXPORTS, NDJSON, export_chunks
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает произведения, отзывы и комментарии в NDJSON или CSV. '
+        'CSV-файлы называются и устроены как в static/data, их можно '
+        'загрузить командой import_csv.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'resources', nargs='*',
+            help=f"Что выгрузить: {', '.join(EXPORTS)}; по умолчанию всё."
+        )
+        parser.add_argument(
+            '--format', choices=(CSV, NDJSON), default=CSV,
+        )
+        parser.add_argument('--path', default='.', help='Каталог выгрузки.')
+        parser.add_argument(
+            '--since-id', type=int, default=0,
+            help='Только записи с id больше указанного.'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+        )
+
+    def handle(self, *args, **options):
+        export_format = options['format']
+        unknown = set(options['resources']) - set(EXPORTS)
+        if unknown:
+            raise CommandError(
+                f"Неизвестные ресурсы: {', '.join(sorted(unknown))}."
+            )
+        os.makedirs(options['path'], exist_ok=True)
+        for resource in options['resources'] or tuple(EXPORTS):
+            filename = (
+                EXPORTS[resource] if export_format == CSV
+                else f'{resource}.{NDJSON}'
+            )
+            size = 0
+            with open(os.path.join(options['path'], filename), 'wb') as file:
+                for chunk in export_chunks(
+                    resource, export_format, options['since_id'],
+                    using=options['database']
+                ):
+                    file.write(chunk)
+                    size += len(chunk)
+            self.stdout.write(f'{filename}: {size} байт')
@@ -0,0 +1,399 @@
+import json
+
+from api.pagination import IdCursorPagination
+from api.views import (CategoriesListView, CommentViewSet, GenreListView,
+                       ReviewViewSet, TitleListView, UserViewSet)
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.db.models.lookups import Exact, In
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+# Таблицы меньше этого размера читаются целиком и без индекса.
+DEFAULT_MIN_ROWS = 1000
+
+
+def sample_values():
+    """Реальные значения параметров: самые популярные объекты."""
+    genres = list(
+        Genre.objects.annotate(titles_count=Count('titles'))
+        .order_by('-titles_count').values_list('slug', flat=True)[:2]
+    )
+    category = Category.objects.annotate(
+        titles_count=Count('titles')
+    ).order_by('-titles_count').values_list('slug', flat=True).first()
+    title = Title.objects.order_by('-reviews_count', 'id').first()
+    review = Review.objects.filter(title=title).annotate(
+        comments_count=Count('comments')
+    ).order_by('-comments_count', 'id').first()
+    user = User.objects.order_by('id').first()
+    if None in (category, title, review, user) or len(genres) < 2:
+        raise CommandError(
+            'Недостаточно данных для проверки: загрузите данные '
+            '(python -m benchmarks.generate и import_csv).'
+        )
+    return {
+        'genres': genres,
+        'category': category,
+        'title': title,
+        'review': review,
+        'user': user,
+    }
+
+
+def audit_cases(samples):
+    """(имя, вьюсет, действие, kwargs, параметры запроса)."""
+    title, review = samples['title'], samples['review']
+    word = title.name.split()[0]
+    title_kwargs = {'title_id': str(title.pk)}
+    review_kwargs = dict(title_kwargs, review_id=str(review.pk))
+    genres = samples['genres']
+    return (
+        ('titles-list', TitleListView, 'list', {}, {}),
+        ('titles-list?name', TitleListView, 'list', {}, {'name': word}),
+        ('titles-list?year', TitleListView, 'list', {}, {'year': title.year}),
+        (
+            'titles-list?category', TitleListView, 'list', {},
+            {'category': samples['category']}
+        ),
+        ('titles-list?genre', TitleListView, 'list', {}, {'genre': genres[0]}),
+        (
+            'titles-list?genre=any', TitleListView, 'list', {},
+            {'genre': ','.join(genres)}
+        ),
+        (
+            'titles-list?genre=all', TitleListView, 'list', {},
+            {'genre': ','.join(genres), 'genre_match': 'all'}
+        ),
+        (
+            'titles-list?ordering', TitleListView, 'list', {},
+            {'ordering': 'id'}
+        ),
+        ('titles-list?search', TitleListView, 'list', {}, {'search': word}),
+        (
+            'titles-list?pagination=cursor', TitleListView, 'list', {},
+            {'pagination': 'cursor'}
+        ),
+        (
+            'titles-detail', TitleListView, 'retrieve',
+            {'pk': str(title.pk)}, {}
+        ),
+        ('genres-list', GenreListView, 'list', {}, {}),
+        ('genres-list?search', GenreListView, 'list', {}, {'search': 'a'}),
+        ('categories-list', CategoriesListView, 'list', {}, {}),
+        ('reviews-list', ReviewViewSet, 'list', title_kwargs, {}),
+        (
+            'reviews-list?pagination=cursor', ReviewViewSet, 'list',
+            title_kwargs, {'pagination': 'cursor'}
+        ),
+        (
+            'reviews-detail', ReviewViewSet, 'retrieve',
+            dict(title_kwargs, pk=str(review.pk)), {}
+        ),
+        ('comments-list', CommentViewSet, 'list', review_kwargs, {}),
+        ('users-list', UserViewSet, 'list', {}, {}),
+        (
+            'users-detail', UserViewSet, 'retrieve',
+            {'username': samples['user'].username}, {}
+        ),
+    )
+
+
+def build_queryset(viewset, action, kwargs, params, page_size):
+    """Выборка, которую строит вьюсет для страницы ответа."""
+    view = viewset()
+    view.request = Request(APIRequestFactory().get('/', params))
+    view.args = ()
+    view.kwargs = kwargs
+    view.format_kwarg = None
+    view.action = action
+    queryset = view.get_queryset()
+    if action == 'retrieve':
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        # QuerySet.get() сбрасывает сортировку.
+        return queryset.filter(
+            **{view.lookup_field: kwargs[lookup_url_kwarg]}
+        ).order_by()
+    queryset = view.filter_queryset(queryset)
+    if params.get('pagination') == 'cursor':
+        ordering = IdCursorPagination().get_ordering(
+            view.request, queryset, view
+        )
+        queryset = queryset.order_by(*ordering)
+    return queryset[:page_size]
+
+
+def query_ordering(queryset):
+    """Сортировка запроса с учётом Meta.ordering."""
+    ordering = queryset.query.order_by
+    if not ordering and queryset.query.default_ordering:
+        ordering = queryset.model._meta.ordering
+    return [
+        name for name in ordering
+        if isinstance(name, str) and '__' not in name and '.' not in name
+    ]
+
+
+def is_pk(model, name):
+    pk = model._meta.pk
+    return name.lstrip('-') in ('pk', pk.name, pk.attname)
+
+
+def index_fields(queryset):
+    """
+    Поля для индекса: столбцы основной таблицы из условий = и IN,
+    затем поля сортировки, кроме первичного ключа — у него индекс
+    уже есть. Сортировку по вычисляемым выражениям (релевантность
+    поиска) индекс не ускорит.
+    """
+    model = queryset.model
+    table = model._meta.db_table
+    if queryset.query.extra_order_by:
+        return []
+    fields = []
+    for child in queryset.query.where.children:
+        lhs = getattr(child, 'lhs', None)
+        if (
+            isinstance(child, (Exact, In))
+            and getattr(lhs, 'alias', None) == table
+            and lhs.target.model is model
+            and not lhs.target.primary_key
+        ):
+            fields.append(lhs.target.name)
+    for name in query_ordering(queryset):
+        if not is_pk(model, name) and name.lstrip('-') not in fields:
+            fields.append(name)
+    return fields
+
+
+def scans_in_pk_order(queryset, result):
+    """
+    Выборка без условий, отсортированная только по первичному ключу
+    и без отдельной сортировки: чтение таблицы в порядке ключа
+    останавливается на LIMIT, это не полное чтение.
+    """
+    ordering = query_ordering(queryset)
+    return (
+        not result['sorts']
+        and not queryset.query.where.children
+        and not queryset.query.extra_order_by
+        and bool(ordering)
+        and all(is_pk(queryset.model, name) for name in ordering)
+    )
+
+
+def suggest_index(queryset):
+    model = queryset.model
+    fields = index_fields(queryset)
+    if not fields:
+        return None
+    # Индекс читается и в обратном направлении.
+    reversed_fields = [
+        field[1:] if field.startswith('-') else f'-{field}'
+        for field in fields
+    ]
+    existing = [index.fields for index in model._meta.indexes]
+    return {
+        'model': model._meta.label,
+        'fields': fields,
+        'exists': fields in existing or reversed_fields in existing,
+        'code': 'models.Index(fields={!r}, name={!r})'.format(
+            fields,
+            '{}_{}_idx'.format(
+                model._meta.model_name,
+                '_'.join(field.lstrip('-') for field in fields)
+            )
+        ),
+    }
+
+
+def explain_postgresql(cursor, sql, params):
+    cursor.execute(
+        f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}', params
+    )
+    result = cursor.fetchone()[0]
+    if isinstance(result, str):
+        result = json.loads(result)
+    plan = result[0]
+    seq_scans, sorts = [], []
+
+    def walk(node):
+        node_type = node['Node Type']
+        if node_type == 'Seq Scan':
+            seq_scans.append(node['Relation Name'])
+        elif node_type in ('Sort', 'Incremental Sort'):
+            sorts.append(', '.join(node.get('Sort Key', ())))
+        for child in node.get('Plans', ()):
+            walk(child)
+
+    walk(plan['Plan'])
+    return {
+        'plan': plan,
+        'seq_scans': seq_scans,
+        'sorts': sorts,
+        'time_ms': plan.get('Execution Time'),
+        'buffers': {
+            'hit': plan['Plan'].get('Shared Hit Blocks', 0),
+            'read': plan['Plan'].get('Shared Read Blocks', 0),
+        },
+    }
+
+
+def explain_sqlite(cursor, sql, params):
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+    plan = [row[-1] for row in cursor.fetchall()]
+    seq_scans, sorts = [], []
+    for detail in plan:
+        words = detail.split()
+        # "SCAN reviews_review" или "SCAN TABLE reviews_review" без
+        # "USING ... INDEX" — полное чтение таблицы.
+        if words[0] == 'SCAN' and 'USING' not in words:
+            table = words[2] if words[1] == 'TABLE' else words[1]
+            seq_scans.append(table)
+        elif 'TEMP B-TREE' in detail:
+            sorts.append(detail)
+    return {'plan': plan, 'seq_scans': seq_scans, 'sorts': sorts}
+
+
+EXPLAIN = {
+    'postgresql': explain_postgresql,
+    'sqlite': explain_sqlite,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для выборок, которые строят вьюсеты API, '
+        'отмечает полные чтения таблиц и сортировки без индекса '
+        'и предлагает индексы для Meta.indexes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=('text', 'json'), default='text'
+        )
+        parser.add_argument(
+            '--min-rows', type=int, default=DEFAULT_MIN_ROWS,
+            help='Не отмечать полные чтения таблиц меньшего размера.'
+        )
+        parser.add_argument(
+            '--only', action='append', default=[],
+            help='Проверять только случаи, имя которых начинается так.'
+        )
+        parser.add_argument(
+            '--fail-on-issues', action='store_true',
+            help='Завершиться с ошибкой, если найдены проблемы.'
+        )
+        parser.add_argument(
+            '--baseline',
+            help=(
+                'JSON-отчёт прошлого запуска: с --fail-on-issues '
+                'ошибкой считаются только новые проблемы.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[Title.objects.db]
+        explain = EXPLAIN.get(connection.vendor)
+        if explain is None:
+            raise CommandError(
+                f'База {connection.vendor} не поддерживается.'
+            )
+        page_size = api_settings.PAGE_SIZE
+        row_counts = {}
+        cases = []
+        with connection.cursor() as cursor:
+            for name, viewset, action, kwargs, params in audit_cases(
+                sample_values()
+            ):
+                if options['only'] and not any(
+                    name.startswith(prefix) for prefix in options['only']
+                ):
+                    continue
+                queryset = build_queryset(
+                    viewset, action, kwargs, params, page_size
+                )
+                sql, sql_params = queryset.query.sql_with_params()
+                result = explain(cursor, sql, sql_params)
+                for table in result['seq_scans']:
+                    if table not in row_counts:
+                        cursor.execute(
+                            'SELECT COUNT(*) FROM {}'.format(
+                                connection.ops.quote_name(table)
+                            )
+                        )
+                        row_counts[table] = cursor.fetchone()[0]
+                pk_order_table = (
+                    queryset.model._meta.db_table
+                    if scans_in_pk_order(queryset, result) else None
+                )
+                result['seq_scans'] = [
+                    table for table in result['seq_scans']
+                    if row_counts[table] >= options['min_rows']
+                    and table != pk_order_table
+                ]
+                issues = bool(result['seq_scans'] or result['sorts'])
+                cases.append(dict(
+                    name=name,
+                    params=params,
+                    sql=sql % tuple(map(repr, sql_params)),
+                    ok=not issues,
+                    suggestion=suggest_index(queryset) if issues else None,
+                    **result
+                ))
+        report = {
+            'database': connection.vendor,
+            'min_rows': options['min_rows'],
+            'ok': all(case['ok'] for case in cases),
+            'cases': cases,
+        }
+        if options['format'] == 'json':
+            self.stdout.write(json.dumps(
+                report, ensure_ascii=False, indent=2, default=str
+            ))
+        else:
+            self.write_text(report)
+        if not options['fail_on_issues']:
+            return
+        known = set()
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                known = {
+                    case['name'] for case in json.load(file)['cases']
+                    if not case['ok']
+                }
+        new = [
+            case['name'] for case in cases
+            if not case['ok'] and case['name'] not in known
+        ]
+        if new:
+            raise CommandError(
+                'Запросы без подходящих индексов: ' + ', '.join(new)
+            )
+
+    def write_text(self, report):
+        for case in report['cases']:
+            if case['ok']:
+                self.stdout.write(self.style.SUCCESS(f"OK    {case['name']}"))
+                continue
+            self.stdout.write(self.style.WARNING(f"CHECK {case['name']}"))
+            for table in case['seq_scans']:
+                self.stdout.write(f'      полное чтение таблицы {table}')
+            for sort in case['sorts']:
+                self.stdout.write(f'      сортировка: {sort}')
+            suggestion = case['suggestion']
+            if suggestion is None:
+                continue
+            if suggestion['exists']:
+                self.stdout.write(
+                    f"      индекс {suggestion['fields']} уже есть "
+                    'в Meta.indexes, но не используется'
+                )
+            else:
+                self.stdout.write(
+                    f"      {suggestion['model']}: {suggestion['code']}"
+                )
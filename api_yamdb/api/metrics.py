@@ -0,0 +1,275 @@
+"""
+Метрики запросов по маршрутам: задержка, число и время SQL-запросов,
+время сериализации и размер ответа.
+
+Каждый поток пишет в свой набор счётчиков, поэтому запись идёт
+без блокировок; при выгрузке наборы всех потоков складываются.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Границы корзин гистограммы задержки, секунды.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+PREFIX = 'yamdb'
+
+
+class RequestState:
+    """Замеры текущего запроса."""
+
+    __slots__ = ('queries', 'sql_time', 'serializer_time', 'depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.depth = 0
+
+
+class RouteStats:
+    """Накопленные значения одного маршрута в одном потоке."""
+
+    __slots__ = (
+        'count', 'duration', 'buckets', 'queries', 'sql_time',
+        'serializer_time', 'response_bytes', 'statuses'
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+    def add(self, other):
+        self.count += other.count
+        self.duration += other.duration
+        self.buckets = [
+            own + their for own, their in zip(self.buckets, other.buckets)
+        ]
+        self.queries += other.queries
+        self.sql_time += other.sql_time
+        self.serializer_time += other.serializer_time
+        self.response_bytes += other.response_bytes
+        for key, value in list(other.statuses.items()):
+            self.statuses[key] = self.statuses.get(key, 0) + value
+
+
+# Счётчики процесса без разбивки по маршрутам:
+# имя -> (имя метки, описание).
+COUNTERS = {
+    'db_connections_opened_total': (
+        'database', 'Открыто соединений с базой.'
+    ),
+    'db_connections_reused_total': (
+        'database', 'Запросов, использовавших уже открытое соединение.'
+    ),
+    'throttle_rejections_total': (
+        'scope', 'Запросов, отклонённых ограничением частоты.'
+    ),
+}
+
+
+class Registry:
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._counter_shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            # Блокировка нужна только при появлении нового потока.
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def increment(self, name, label):
+        counters = getattr(self._local, 'counters', None)
+        if counters is None:
+            counters = self._local.counters = {}
+            with self._lock:
+                self._counter_shards.append(counters)
+        key = (name, label)
+        counters[key] = counters.get(key, 0) + 1
+
+    def collect_counters(self):
+        with self._lock:
+            shards = list(self._counter_shards)
+        total = {}
+        for counters in shards:
+            for key, value in list(counters.items()):
+                total[key] = total.get(key, 0) + value
+        return total
+
+    @property
+    def current(self):
+        """Замеры запроса, который обрабатывает этот поток, или None."""
+        return getattr(self._local, 'request', None)
+
+    def start_request(self):
+        self._local.request = RequestState()
+        return self._local.request
+
+    def finish_request(self, route, method, status, duration, size):
+        state = self._local.request
+        self._local.request = None
+        shard = self._shard()
+        stats = shard.get(route)
+        if stats is None:
+            stats = shard[route] = RouteStats()
+        stats.count += 1
+        stats.duration += duration
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                stats.buckets[index] += 1
+                break
+        stats.queries += state.queries
+        stats.sql_time += state.sql_time
+        stats.serializer_time += state.serializer_time
+        stats.response_bytes += size
+        key = (method, status)
+        stats.statuses[key] = stats.statuses.get(key, 0) + 1
+
+    def collect(self):
+        """Сумма счётчиков всех потоков по маршрутам."""
+        with self._lock:
+            shards = list(self._shards)
+        total = {}
+        for shard in shards:
+            # Копия словаря снимается атомарно под GIL.
+            for route, stats in list(shard.items()):
+                total.setdefault(route, RouteStats()).add(stats)
+        return total
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards + self._counter_shards:
+                shard.clear()
+
+
+registry = Registry()
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка connection.execute_wrapper: считает SQL-запросы."""
+    state = registry.current
+    if state is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state.queries += 1
+        state.sql_time += time.perf_counter() - started
+
+
+@contextmanager
+def serializer_timer():
+    """
+    Замеряет время сериализации. Вложенные сериализаторы
+    не учитываются повторно.
+    """
+    state = registry.current
+    if state is None or state.depth:
+        yield
+        return
+    state.depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        state.serializer_time += time.perf_counter() - started
+        state.depth -= 1
+
+
+class MeasuredSerializerMixin:
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+
+def _labels(**labels):
+    return ','.join(
+        '{}="{}"'.format(
+            name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+        )
+        for name, value in labels.items()
+    )
+
+
+def render(extra=()):
+    """Метрики в текстовом формате Prometheus."""
+    routes = sorted(registry.collect().items())
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+        lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+        for suffix, labels, value in samples:
+            if labels:
+                labels = f'{{{labels}}}'
+            lines.append(f'{PREFIX}_{name}{suffix}{labels} {value}')
+
+    metric(
+        'http_requests_total', 'counter', 'Число запросов.',
+        (
+            ('', _labels(route=route, method=method, status=status), count)
+            for route, stats in routes
+            for (method, status), count in sorted(stats.statuses.items())
+        )
+    )
+
+    def histogram():
+        for route, stats in routes:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += count
+                yield '_bucket', _labels(route=route, le=bound), cumulative
+            yield '_bucket', _labels(route=route, le='+Inf'), stats.count
+            yield '_sum', _labels(route=route), stats.duration
+            yield '_count', _labels(route=route), stats.count
+
+    metric(
+        'http_request_duration_seconds', 'histogram',
+        'Время обработки запроса.', histogram()
+    )
+    for name, attribute, help_text in (
+        ('db_queries_total', 'queries', 'Число SQL-запросов.'),
+        ('db_query_seconds_total', 'sql_time', 'Время SQL-запросов.'),
+        (
+            'serializer_seconds_total', 'serializer_time',
+            'Время сериализации ответов.'
+        ),
+        ('http_response_bytes_total', 'response_bytes', 'Размер ответов.'),
+    ):
+        metric(
+            name, 'counter', help_text,
+            (
+                ('', _labels(route=route), getattr(stats, attribute))
+                for route, stats in routes
+            )
+        )
+    counters = sorted(registry.collect_counters().items())
+    for name, (label, help_text) in COUNTERS.items():
+        metric(
+            name, 'counter', help_text,
+            (
+                ('', _labels(**{label: value}), count)
+                for (counter, value), count in counters
+                if counter == name
+            )
+        )
+    for name, kind, help_text, value in extra:
+        metric(name, kind, help_text, (('', '', value),))
+    return '\n'.join(lines) + '\n'
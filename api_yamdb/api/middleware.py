@@ -0,0 +1,40 @@
+import time
+from contextlib import ExitStack
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from api_yamdb.settings import METRICS_ENABLED
+
+from .metrics import record_query, registry
+
+
+class MetricsMiddleware:
+    """
+    Собирает метрики запроса по имени маршрута (titles-list,
+    reviews-detail и т.п.). Ставится первым в MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        if not METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        registry.start_request()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        if match is None:
+            route = 'unmatched'
+        else:
+            route = match.url_name or 'unnamed'
+        size = 0 if response.streaming else len(response.content)
+        registry.finish_request(
+            route, request.method, response.status_code, duration, size
+        )
+        return response
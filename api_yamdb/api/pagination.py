@@ -0,0 +1,56 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """Постраничный вывод по ключу: без COUNT и OFFSET."""
+
+    ordering = '-id'
+
+    def get_ordering(self, request, queryset, view):
+        # Без параметра ?ordering OrderingFilter возвращает None,
+        # тогда курсор строится по id.
+        for backend in getattr(view, 'filter_backends', ()):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    return tuple(ordering)
+        return (self.ordering,)
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    По умолчанию — постраничный вывод по номеру страницы.
+    Курсорный режим включается параметром ?pagination=cursor
+    и сохраняется в ссылках next/previous.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_pagination_class = IdCursorPagination
+
+    def is_cursor_request(self, request):
+        cursor_pagination = self.cursor_pagination_class
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or cursor_pagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if not self.is_cursor_request(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_pagination_class()
+        self.display_page_controls = True
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
@@ -33,6 +33,6 @@ class AdminOrModeratorOrAuthor(permissions.IsAuthenticatedOrReadOnly):
             and (
                 request.user.is_admin
                 or request.user.is_moderator
-                or obj.author == request.user
+                or obj.author_id == request.user.id
             )
         )
@@ -0,0 +1,118 @@
+"""
+JSON через orjson или ujson, если они установлены.
+
+Настройка JSON_BACKEND: auto — самая быстрая из установленных
+библиотек, иначе json стандартной библиотеки; json — вывод байт в байт
+как у JSONRenderer DRF, для тестов и сравнения. Типы, которых нет
+в JSON (datetime, Decimal, ленивые строки), преобразуются
+rest_framework.utils.encoders.JSONEncoder, как в DRF. Ответы
+с отступами (браузерный API, indent в Accept) строит стандартная
+библиотека.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+AUTO = 'auto'
+STDLIB = 'json'
+
+# Порядок выбора для auto.
+BACKENDS = {
+    'orjson': orjson,
+    'ujson': ujson,
+}
+
+_default = JSONEncoder().default
+
+
+def _orjson_dumps(data):
+    return orjson.dumps(
+        data, default=_default,
+        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    )
+
+
+def _ujson_dumps(data):
+    return ujson.dumps(
+        data, ensure_ascii=False, escape_forward_slashes=False,
+        default=_default
+    ).encode()
+
+
+DUMPS = {
+    'orjson': _orjson_dumps,
+    'ujson': _ujson_dumps,
+}
+
+# ujson.loads() принимает NaN и Infinity, которые STRICT_JSON
+# запрещает, поэтому разбор с ujson идёт стандартной библиотекой.
+LOADS = {
+    'orjson': orjson and orjson.loads,
+}
+
+
+def get_backend():
+    """Имя библиотеки JSON по настройке JSON_BACKEND."""
+    name = settings.JSON_BACKEND
+    if name == AUTO:
+        for backend, module in BACKENDS.items():
+            if module is not None:
+                return backend
+        return STDLIB
+    if name != STDLIB and BACKENDS.get(name) is None:
+        raise ImproperlyConfigured(
+            f'JSON_BACKEND={name}: библиотека не установлена.'
+        )
+    return name
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        backend = get_backend()
+        if (
+            data is None
+            or backend == STDLIB
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(
+                accepted_media_type, renderer_context or {}
+            ) is not None
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        # Как в JSONRenderer: U+2028 и U+2029 экранируются, чтобы
+        # ответ оставался корректным JavaScript.
+        return DUMPS[backend](data).replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        loads = LOADS.get(get_backend())
+        encoding = (parser_context or {}).get(
+            'encoding', settings.DEFAULT_CHARSET
+        )
+        if loads is None or encoding.lower() not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
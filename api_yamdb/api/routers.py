@@ -0,0 +1,119 @@
+"""
+Чтение из реплик.
+
+Безопасные запросы к вьюсетам с ReplicaReadMixin читают из случайной
+реплики, выбранной на весь запрос. Остальные запросы, запись
+и аутентификация работают с основной базой. После записи пользователь
+DB_REPLICA_STICKY_SECONDS секунд читает из основной базы, чтобы сразу
+видеть свои изменения, несмотря на отставание реплик.
+
+Время записи передаётся подписанной cookie — её видит любой воркер —
+и сохраняется в кэше API_CACHE_ALIAS для клиентов без cookie; кэш
+виден всем воркерам, только если он общий.
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+from api_yamdb.settings import API_CACHE_ALIAS
+
+STICKY_KEY = 'db:sticky:{}'
+
+STICKY_COOKIE = 'db_sticky'
+
+STICKY_SALT = 'api.routers.sticky'
+
+_state = threading.local()
+
+
+def replica_alias():
+    """Реплика, выбранная для текущего запроса, или None."""
+    return getattr(_state, 'alias', None)
+
+
+def choose_replica():
+    return random.choice(settings.DB_REPLICAS)
+
+
+def mark_user_wrote(user_id):
+    caches[API_CACHE_ALIAS].set(
+        STICKY_KEY.format(user_id), time.time(),
+        settings.DB_REPLICA_STICKY_SECONDS
+    )
+
+
+def is_sticky(user_id):
+    return caches[API_CACHE_ALIAS].get(
+        STICKY_KEY.format(user_id)
+    ) is not None
+
+
+def has_sticky_cookie(request):
+    # Значение — id пользователя: cookie другого пользователя
+    # на том же клиенте не действует.
+    return request.get_signed_cookie(
+        STICKY_COOKIE, default=None, salt=STICKY_SALT,
+        max_age=settings.DB_REPLICA_STICKY_SECONDS
+    ) == str(request.user.pk)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return replica_alias() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы вьюсета читают из реплики."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            settings.DB_REPLICAS
+            and request.method in SAFE_METHODS
+            and not (
+                request.user.is_authenticated
+                and (
+                    has_sticky_cookie(request)
+                    or is_sticky(request.user.pk)
+                )
+            )
+        ):
+            _state.alias = choose_replica()
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _state.alias = None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            settings.DB_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            mark_user_wrote(request.user.pk)
+            response.set_signed_cookie(
+                STICKY_COOKIE, str(request.user.pk), salt=STICKY_SALT,
+                max_age=settings.DB_REPLICA_STICKY_SECONDS, httponly=True
+            )
+        return super().finalize_response(
+            request, response, *args, **kwargs
+        )
@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.shortcuts import get_object_or_404
@@ -8,12 +10,16 @@ from reviews.models import Category, Comment, Genre, Review, Title
 from users.models import User
 
 from api_yamdb.settings import (AUTH_CONF_CODE_MAXLENGTH, AUTH_EMAIL_MAXLENGTH,
+                                AUTH_SIGNED_CODE_LENGTH,
                                 AUTH_USERNAME_MAXLENGTH)
 
+from .metrics import MeasuredSerializerMixin
+from .utils import check_confirmation_code
 from .validators import validate_username, validate_year
 
 
-class CategoriesSerializer(serializers.ModelSerializer):
+class CategoriesSerializer(MeasuredSerializerMixin,
+                           serializers.ModelSerializer):
 
     class Meta:
         fields = ('name', 'slug')
@@ -21,7 +27,7 @@ class CategoriesSerializer(serializers.ModelSerializer):
         extra_kwargs = {'slug': {'required': True}}
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         fields = ('name', 'slug')
@@ -29,7 +35,16 @@ class GenreSerializer(serializers.ModelSerializer):
         extra_kwargs = {'slug': {'required': True}}
 
 
-class TitleSerializer(serializers.ModelSerializer):
+# Связанные объекты произведения, которые ?expand= показывает вложенными.
+TITLE_EXPANDABLE = ('genre', 'category')
+
+
+class TitleSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
+    """
+    В контексте можно передать fields — поля ответа, и expand — какие
+    из TITLE_EXPANDABLE показывать объектами, а не slug.
+    По умолчанию выводятся все поля, жанры и категория вложены.
+    """
     category = serializers.SlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all()
@@ -44,13 +59,31 @@ class TitleSerializer(serializers.ModelSerializer):
     year = serializers.IntegerField(validators=[validate_year])
 
     class Meta:
-        fields = '__all__'
+        fields = ('id', 'name', 'year', 'rating', 'description',
+                  'genre', 'category')
         model = Title
 
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get('fields')
+        if selected is None:
+            return fields
+        return OrderedDict(
+            (name, field) for name, field in fields.items()
+            if name in selected
+        )
+
     def to_representation(self, instance):
         response = super().to_representation(instance)
-        response['genre'] = GenreSerializer(instance.genre, many=True).data
-        response['category'] = CategoriesSerializer(instance.category).data
+        expand = self.context.get('expand', TITLE_EXPANDABLE)
+        if 'genre' in response and 'genre' in expand:
+            response['genre'] = GenreSerializer(
+                instance.genre, many=True
+            ).data
+        if 'category' in response and 'category' in expand:
+            response['category'] = CategoriesSerializer(
+                instance.category
+            ).data
         return response
 
 
@@ -64,7 +97,7 @@ class TitleDefault:
         )
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username',
@@ -76,7 +109,7 @@ class ReviewSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = '__all__'
+        exclude = ('updated',)
         model = Review
         validators = [
             UniqueTogetherValidator(
@@ -86,7 +119,8 @@ class ReviewSerializer(serializers.ModelSerializer):
         ]
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(MeasuredSerializerMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
@@ -94,7 +128,7 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = '__all__'
+        exclude = ('updated',)
         read_only_fields = ('review', )
 
 
@@ -122,8 +156,10 @@ class RegisterSerializer(AuthSerializer):
 
 
 class GetTokenSerializer(AuthSerializer):
+    """Проверенный пользователь возвращается в validated_data['user']."""
+
     confirmation_code = serializers.CharField(
-        max_length=AUTH_CONF_CODE_MAXLENGTH,
+        max_length=max(AUTH_CONF_CODE_MAXLENGTH, AUTH_SIGNED_CODE_LENGTH),
         required=True
     )
 
@@ -135,13 +171,14 @@ class GetTokenSerializer(AuthSerializer):
             raise NotFound(
                 detail=f'Пользователя с именем {username} не существует.'
             )
-        if user.confirmation_code != data.get('confirmation_code'):
+        if not check_confirmation_code(user, data['confirmation_code']):
             raise serializers.ValidationError(
                 'Некорректный код подтверждения.')
+        data['user'] = user
         return data
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('username', 'email', 'first_name',
@@ -0,0 +1,98 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+from users.models import User
+
+from .authentication import USER_CLAIMS, mark_user_changed
+from .cache import bump_all_versions, bump_version
+
+
+def invalidate(resource, scope=None):
+    """Увеличивает версию ресурса после фиксации транзакции."""
+    transaction.on_commit(partial(bump_version, resource, scope))
+
+
+@receiver([post_save, post_delete], sender=Title)
+@receiver([post_save, post_delete, m2m_changed], sender=TitleGenre)
+def title_changed(sender, **kwargs):
+    invalidate('titles')
+
+
+def touch(queryset):
+    """
+    Обновляет поле updated: ETag строится по нему, а вложенные
+    объекты в представлении записей изменились.
+    """
+    # Время, как у auto_now: Now() в SQLite хранит только секунды.
+    queryset.update(updated=timezone.now())
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def nested_saved(sender, instance, created, **kwargs):
+    if not created:
+        touch(instance.titles.all())
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Category)
+def nested_deleted(sender, instance, **kwargs):
+    # После удаления связанные произведения уже не найти.
+    touch(instance.titles.all())
+
+
+@receiver([post_save, post_delete], sender=Genre)
+def genre_changed(sender, **kwargs):
+    invalidate('titles')
+    invalidate('genres')
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, **kwargs):
+    invalidate('titles')
+    invalidate('categories')
+
+
+@receiver([post_save, post_delete], sender=Review)
+def review_changed(sender, instance, **kwargs):
+    # Рейтинг произведения меняется вместе с отзывами.
+    invalidate('titles')
+    invalidate('reviews', str(instance.title_id))
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate('comments', str(instance.review_id))
+
+
+@receiver(pre_save, sender=User)
+def username_changing(sender, instance, update_fields=None, **kwargs):
+    instance._username_changed = False
+    if instance.pk is None or (
+        update_fields is not None and 'username' not in update_fields
+    ):
+        return
+    username = User.objects.filter(pk=instance.pk).values_list(
+        'username', flat=True
+    ).first()
+    instance._username_changed = username not in (None, instance.username)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if getattr(instance, '_username_changed', False):
+        # Имя автора выводится в отзывах и комментариях к разным
+        # произведениям: устаревают все закэшированные ответы.
+        touch(Review.objects.filter(author=instance))
+        touch(Comment.objects.filter(author=instance))
+        transaction.on_commit(bump_all_versions)
+    if update_fields is not None and not set(USER_CLAIMS) & set(
+        update_fields
+    ):
+        return
+    mark_user_changed(instance.pk)
@@ -0,0 +1,80 @@
+import asyncio
+
+from api.asgi import ASGIHandler, build_environ, is_read
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+
+
+def scope(method, path, query_string=b'', headers=()):
+    return {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query_string,
+        'headers': list(headers),
+        'http_version': '1.1',
+        'scheme': 'http',
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 5000),
+    }
+
+
+class ASGIHandlerTest(SimpleTestCase):
+
+    def request(self, request_scope):
+        """Сообщения, отправленные приложением."""
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def run():
+            sent = asyncio.Queue()
+            handler = ASGIHandler(get_wsgi_application())
+            await handler(request_scope, receive, sent.put)
+            return [sent.get_nowait() for _ in range(sent.qsize())]
+
+        return asyncio.run(run())
+
+    def test_build_environ(self):
+        environ = build_environ(
+            scope(
+                'GET', '/api/v1/titles/фильм/', b'genre=drama',
+                (
+                    (b'content-type', b'application/json'),
+                    (b'accept', b'text/html'),
+                    (b'accept', b'application/json'),
+                )
+            ),
+            b'{}'
+        )
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode(),
+            '/api/v1/titles/фильм/'
+        )
+        self.assertEqual(environ['QUERY_STRING'], 'genre=drama')
+        self.assertEqual(environ['CONTENT_TYPE'], 'application/json')
+        self.assertEqual(
+            environ['HTTP_ACCEPT'], 'text/html,application/json'
+        )
+        self.assertEqual(environ['wsgi.input'].read(), b'{}')
+
+    def test_is_read(self):
+        self.assertTrue(is_read(scope('GET', '/api/v1/titles/')))
+        self.assertTrue(is_read(scope('GET', '/api/v1/titles/1/reviews/')))
+        self.assertFalse(is_read(scope('POST', '/api/v1/titles/')))
+        self.assertFalse(is_read(scope('GET', '/api/v1/users/')))
+        self.assertFalse(is_read(scope('GET', '/no-such-page/')))
+
+    def test_response(self):
+        start, body = self.request(scope('GET', '/metrics'))
+        self.assertEqual(start['type'], 'http.response.start')
+        self.assertEqual(start['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/plain; version=0.0.4; charset=utf-8'),
+            start['headers']
+        )
+        self.assertTrue(body['body'].startswith(b'# HELP'))
+
+    def test_head_without_body(self):
+        start, body = self.request(scope('HEAD', '/metrics'))
+        self.assertEqual(start['status'], 200)
+        self.assertEqual(body['body'], b'')
@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from reviews.models import Title
+from users.models import User
+
+from ..authentication import access_token_for_user, user_states
+
+
+class ClaimsAuthenticationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='reader', email='r@ya.ru')
+        cls.title = Title.objects.create(name='Фильм', year=2000)
+
+    def setUp(self):
+        cache.clear()
+        user_states._data.clear()
+
+    def auth(self, user):
+        token = access_token_for_user(user)
+        return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_permission_check_without_user_query(self):
+        headers = self.auth(self.user)
+        # Кэш тестов — кэш процесса: состояние пользователя читается
+        # из базы один раз за AUTH_CLAIMS_CACHE_TTL.
+        self.client.post(reverse('titles-list'), {'name': 'x'}, **headers)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                reverse('titles-list'), {'name': 'x'}, **headers)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(
+            any('users_user' in query['sql']
+                for query in context.captured_queries)
+        )
+
+    def test_me_loads_full_user(self):
+        response = self.client.get(reverse('users-me'), **self.auth(self.user))
+        self.assertEqual(response.json()['email'], 'r@ya.ru')
+
+    def test_role_change_overrides_token_claims(self):
+        headers = self.auth(self.user)
+        self.user.role = User.ROLE_ADMIN
+        self.user.save()
+        response = self.client.delete(
+            reverse('titles-detail', args=(self.title.pk,)), **headers)
+        self.assertEqual(response.status_code, 204)
+
+    def test_role_change_in_other_process(self):
+        headers = self.auth(self.user)
+        url = reverse('titles-detail', args=(self.title.pk,))
+        self.assertEqual(self.client.delete(url, **headers).status_code, 403)
+        # Изменение без сигнала этого процесса, как в другом воркере.
+        User.objects.filter(pk=self.user.pk).update(role=User.ROLE_ADMIN)
+        self.assertEqual(self.client.delete(url, **headers).status_code, 403)
+        user_states._data.clear()
+        self.assertEqual(self.client.delete(url, **headers).status_code, 204)
@@ -0,0 +1,118 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+from . import NO_CACHE
+
+
+@override_settings(CACHES=NO_CACHE)
+class BulkCreateTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role=User.ROLE_ADMIN)
+        Category.objects.create(name='Фильм', slug='movie')
+        Genre.objects.create(name='Драма', slug='drama')
+        Genre.objects.create(name='Комедия', slug='comedy')
+        cls.title = Title.objects.create(name='Фильм', year=2000)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def title_item(self, name, genre=('drama',), category='movie'):
+        return {
+            'name': name, 'year': 2001, 'description': 'Описание',
+            'genre': list(genre), 'category': category,
+        }
+
+    def test_titles(self):
+        url = reverse('titles-bulk')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, [
+                self.title_item('Первый', ('drama', 'comedy')),
+                self.title_item('Второй', ('comedy', 'comedy')),
+            ], format='json')
+        self.assertEqual(response.status_code, 201)
+        sql = [query['sql'] for query in context.captured_queries]
+        self.assertEqual(len([q for q in sql if '"slug" IN' in q]), 2)
+        self.assertEqual(
+            len([q for q in sql if 'INSERT INTO "reviews_titlegenre"' in q]),
+            1
+        )
+        created = Title.objects.filter(pk__in=response.json()['created'])
+        self.assertEqual(
+            {title.name: sorted(title.genre.values_list('slug', flat=True))
+             for title in created},
+            {'Первый': ['comedy', 'drama'], 'Второй': ['comedy']}
+        )
+
+    def test_titles_per_item_errors(self):
+        response = self.client.post(reverse('titles-bulk'), [
+            self.title_item('Первый'),
+            self.title_item('Второй', ('horror',)),
+            {'name': 'Третий'},
+            self.title_item('Четвёртый', category='book'),
+        ], format='json')
+        self.assertEqual(response.status_code, 207)
+        data = response.json()
+        self.assertEqual(len(data['created']), 1)
+        self.assertEqual(
+            [(error['index'], sorted(error['errors'])) for error in
+             data['errors']],
+            [(1, ['genre']), (2, ['category', 'description', 'genre', 'year']),
+             (3, ['category'])]
+        )
+
+    def test_titles_admin_only(self):
+        self.client.force_authenticate(
+            User.objects.create(username='user', email='user@ya.ru'))
+        response = self.client.post(
+            reverse('titles-bulk'), [self.title_item('Первый')],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_reviews(self):
+        for name in ('first', 'second'):
+            User.objects.create(username=name, email=f'{name}@ya.ru')
+        Review.objects.create(
+            title=self.title, author=self.admin, text='text', score=2)
+        response = self.client.post(
+            reverse('reviews-bulk', args=(self.title.pk,)),
+            [
+                {'author': 'first', 'text': 'text', 'score': 10},
+                {'author': 'second', 'text': 'text', 'score': 6},
+                {'author': 'first', 'text': 'again', 'score': 1},
+                {'author': 'admin', 'text': 'again', 'score': 1},
+                {'author': 'nobody', 'text': 'text', 'score': 1},
+            ],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 207)
+        data = response.json()
+        self.assertEqual(len(data['created']), 2)
+        self.assertEqual(
+            [error['index'] for error in data['errors']], [2, 3, 4])
+        self.title.refresh_from_db()
+        self.assertEqual(self.title.reviews_count, 3)
+        self.assertEqual(self.title.rating, 6)
+        stats = self.client.get(
+            reverse('titles-rating-stats', args=(self.title.pk,))
+        ).json()
+        self.assertEqual(stats['total'], 3)
+        self.assertEqual(
+            {score: count for score, count in stats['scores'].items()
+             if count},
+            {'2': 1, '6': 1, '10': 1}
+        )
+
+    def test_rejects_non_list(self):
+        response = self.client.post(
+            reverse('titles-bulk'), self.title_item('Первый'), format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.urls import reverse
+from reviews.models import Genre, Review, Title
+from users.models import User
+
+
+class ResponseCacheTest(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.title = Title.objects.create(name='Фильм', year=2000)
+        self.reviews_url = reverse('reviews-list', args=(self.title.pk,))
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_hit_after_miss(self):
+        url = reverse('titles-list')
+        self.assertEqual(self.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+        self.assertEqual(self.get(url, year=2000)['X-Cache'], 'MISS')
+
+    def test_not_modified_from_cache(self):
+        etag = self.get(self.reviews_url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.reviews_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response['ETag'], etag)
+        response = self.get(self.reviews_url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_review_invalidates_titles_and_reviews(self):
+        detail_url = reverse('titles-detail', args=(self.title.pk,))
+        self.assertIsNone(self.get(detail_url).json()['rating'])
+        self.assertEqual(self.get(self.reviews_url).json()['count'], 0)
+        Review.objects.create(
+            title=self.title,
+            author=User.objects.create(username='user', email='u@ya.ru'),
+            text='text',
+            score=8
+        )
+        response = self.get(detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['rating'], 8)
+        self.assertEqual(self.get(self.reviews_url).json()['count'], 1)
+
+    def test_genre_invalidates_genres(self):
+        url = reverse('genres-list')
+        self.get(url)
+        Genre.objects.create(name='Драма', slug='drama')
+        self.assertEqual(self.get(url).json()['count'], 1)
@@ -0,0 +1,84 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from reviews.models import Category, Review, Title
+from users.models import User
+
+from . import NO_CACHE
+
+
+@override_settings(CACHES=NO_CACHE)
+class ConditionalRequestTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author', email='a@ya.ru')
+        cls.title = Title.objects.create(name='Фильм', year=2000)
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.author, text='text', score=5)
+        cls.list_url = reverse('reviews-list', args=(cls.title.pk,))
+        cls.detail_url = reverse(
+            'reviews-detail', args=(cls.title.pk, cls.review.pk))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def test_list_not_modified(self):
+        etag = self.client.get(self.list_url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.client.patch(self.detail_url, {'text': 'new text'})
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_not_modified(self):
+        url = reverse('titles-detail', args=(self.title.pk,))
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_match(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        response = self.client.patch(
+            self.detail_url, {'text': 'first'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(
+            self.detail_url, {'text': 'second'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.text, 'first')
+
+    def test_title_if_match(self):
+        admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role=User.ROLE_ADMIN)
+        self.client.force_authenticate(admin)
+        url = reverse('titles-detail', args=(self.title.pk,))
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(
+            self.client.get(url, {'fields': 'name'})['ETag'], etag)
+        response = self.client.patch(
+            url, {'name': 'Новый фильм'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.delete(url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+
+    def test_nested_changes(self):
+        category = Category.objects.create(name='Фильмы', slug='films')
+        Title.objects.filter(pk=self.title.pk).update(category=category)
+        url = reverse('titles-detail', args=(self.title.pk,))
+        etag = self.client.get(url)['ETag']
+        category.name = 'Кино'
+        category.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['category']['name'], 'Кино')
+        etag = self.client.get(self.list_url)['ETag']
+        self.author.username = 'writer'
+        self.author.save()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['author'], 'writer')
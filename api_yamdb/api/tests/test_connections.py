@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from api.metrics import registry, render
+from django.test import SimpleTestCase, override_settings
+from psycopg2 import OperationalError, extensions
+
+from api_yamdb.postgresql_pool.base import ConnectionPool
+
+
+class FakeConnection:
+
+    def __init__(self, usable=True):
+        self.closed = 0
+        self.usable = usable
+        self.rolled_back = False
+        self.info = SimpleNamespace(
+            transaction_status=extensions.TRANSACTION_STATUS_IDLE
+        )
+
+    def cursor(self):
+        if not self.usable:
+            raise OperationalError('server closed the connection')
+        return mock.Mock()
+
+    def rollback(self):
+        self.rolled_back = True
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@override_settings(DB_HEALTH_CHECK_IDLE=30)
+class ConnectionPoolTest(SimpleTestCase):
+
+    def test_reuses_released_connection(self):
+        pool = ConnectionPool(size=2, timeout=1)
+        connection, opened = pool.acquire(FakeConnection)
+        self.assertTrue(opened)
+        pool.release(connection)
+        self.assertEqual(pool.acquire(FakeConnection), (connection, False))
+
+    def test_rolls_back_open_transaction(self):
+        pool = ConnectionPool(size=1, timeout=1)
+        connection, _ = pool.acquire(FakeConnection)
+        connection.info.transaction_status = (
+            extensions.TRANSACTION_STATUS_INTRANS
+        )
+        pool.release(connection)
+        self.assertTrue(connection.rolled_back)
+        self.assertIs(pool.acquire(FakeConnection)[0], connection)
+
+    def test_size_limit(self):
+        pool = ConnectionPool(size=1, timeout=0.01)
+        pool.acquire(FakeConnection)
+        with self.assertRaises(OperationalError):
+            pool.acquire(FakeConnection)
+
+    @override_settings(DB_HEALTH_CHECK_IDLE=0)
+    def test_replaces_dead_idle_connection(self):
+        pool = ConnectionPool(size=1, timeout=1)
+        connection, _ = pool.acquire(FakeConnection)
+        pool.release(connection)
+        connection.usable = False
+        new_connection, opened = pool.acquire(FakeConnection)
+        self.assertTrue(opened)
+        self.assertIsNot(new_connection, connection)
+        self.assertTrue(connection.closed)
+
+    def test_connection_counters(self):
+        registry.reset()
+        registry.increment('db_connections_opened_total', 'default')
+        registry.increment('db_connections_reused_total', 'default')
+        registry.increment('db_connections_reused_total', 'default')
+        text = render()
+        self.assertIn(
+            'yamdb_db_connections_opened_total{database="default"} 1', text
+        )
+        self.assertIn(
+            'yamdb_db_connections_reused_total{database="default"} 2', text
+        )
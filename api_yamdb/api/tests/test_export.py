@@ -0,0 +1,141 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Review, Title
+from users.models import User
+
+from . import NO_CACHE
+
+
+def export_url(resource, export_format):
+    return reverse(
+        'export',
+        kwargs={'resource': resource, 'export_format': export_format}
+    )
+
+
+def static_header(filename):
+    with open(
+        os.path.join(settings.BASE_DIR, 'static', 'data', filename),
+        encoding='utf-8'
+    ) as file:
+        return next(csv.reader(file))
+
+
+@override_settings(CACHES=NO_CACHE, EXPORT_CHUNK_SIZE=2)
+class ExportTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role=User.ROLE_ADMIN)
+        cls.user = User.objects.create(username='user', email='u@ya.ru')
+        category = Category.objects.create(name='Фильм', slug='movie')
+        cls.titles = [
+            Title.objects.create(name=f'Фильм {i}', year=2000, category=(
+                category if i else None
+            ))
+            for i in range(3)
+        ]
+        cls.review = Review.objects.create(
+            title=cls.titles[0], author=cls.user, score=7,
+            text='Строка, "кавычки"\nи перевод строки'
+        )
+        Comment.objects.create(review=cls.review, author=cls.user, text='Да')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, resource, export_format, **params):
+        response = self.client.get(
+            export_url(resource, export_format), params
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        rows = [
+            json.loads(line)
+            for line in self.get('titles', 'ndjson').splitlines()
+        ]
+        self.assertEqual(
+            rows[0],
+            {'id': self.titles[0].pk, 'name': 'Фильм 0', 'year': 2000,
+             'category': None}
+        )
+        self.assertEqual(
+            [row['id'] for row in rows], [title.pk for title in self.titles]
+        )
+
+    def test_since_id(self):
+        rows = self.get(
+            'titles', 'ndjson', since_id=self.titles[0].pk
+        ).splitlines()
+        self.assertEqual(len(rows), 2)
+
+    def test_csv_matches_static_data(self):
+        for resource, filename in (
+            ('titles', 'titles.csv'),
+            ('reviews', 'review.csv'),
+            ('comments', 'comments.csv'),
+        ):
+            rows = list(csv.reader(io.StringIO(self.get(resource, 'csv'))))
+            self.assertEqual(rows[0], static_header(filename))
+        review = dict(zip(rows[0], rows[1]))
+        self.assertTrue(review['pub_date'].endswith('Z'))
+        rows = list(csv.reader(io.StringIO(self.get('reviews', 'csv'))))
+        self.assertEqual(rows[1][2], self.review.text)
+
+    def test_errors(self):
+        response = self.client.get(
+            export_url('titles', 'csv'), {'since_id': 'abc'}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(export_url('users', 'csv'))
+        self.assertEqual(response.status_code, 404)
+        self.client.force_authenticate(self.user)
+        response = self.client.get(export_url('titles', 'csv'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as path:
+            call_command(
+                'export_data', 'titles', 'reviews', path=path,
+                stdout=io.StringIO()
+            )
+            self.assertEqual(
+                sorted(os.listdir(path)), ['review.csv', 'titles.csv']
+            )
+            with open(os.path.join(path, 'titles.csv')) as file:
+                self.assertEqual(len(file.readlines()), 4)
+
+    def test_round_trip(self):
+        Title.objects.filter(pk=self.titles[1].pk).update(year=None)
+        with tempfile.TemporaryDirectory() as path:
+            call_command(
+                'export_data', 'titles', path=path, stdout=io.StringIO()
+            )
+            Title.objects.all().delete()
+            call_command('import_csv', path=path, stdout=io.StringIO())
+        self.assertEqual(
+            list(Title.objects.order_by('pk').values_list(
+                'pk', 'name', 'year', 'category'
+            )),
+            [
+                (self.titles[0].pk, 'Фильм 0', 2000, None),
+                (self.titles[1].pk, 'Фильм 1', None,
+                 self.titles[1].category_id),
+                (self.titles[2].pk, 'Фильм 2', 2000,
+                 self.titles[2].category_id),
+            ]
+        )
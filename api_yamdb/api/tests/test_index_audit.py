@@ -0,0 +1,58 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+
+class IndexAuditTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genres = [
+            Genre.objects.create(name=name, slug=slug)
+            for name, slug in (('Драма', 'drama'), ('Комедия', 'comedy'))
+        ]
+        author = User.objects.create(username='author', email='a@ya.ru')
+        title = Title.objects.create(
+            name='Крёстный отец', year=1972, category=category)
+        title.genre.set(genres)
+        review = Review.objects.create(
+            title=title, author=author, text='text', score=10)
+        Comment.objects.create(review=review, author=author, text='text')
+
+    def audit(self, *args):
+        out = StringIO()
+        call_command('index_audit', '--format', 'json', *args, stdout=out)
+        return {
+            case['name']: case
+            for case in json.loads(out.getvalue())['cases']
+        }
+
+    def test_nested_lists_use_composite_indexes(self):
+        cases = self.audit('--min-rows', '0')
+        self.assertIn('titles-list?genre=all', cases)
+        for name in ('reviews-list', 'comments-list'):
+            self.assertTrue(cases[name]['ok'], cases[name]['plan'])
+        self.assertIn(
+            'review_title_id_idx', ' '.join(cases['reviews-list']['plan']))
+
+    def test_suggestion(self):
+        case = self.audit('--only', 'titles-list?category')[
+            'titles-list?category']
+        self.assertFalse(case['ok'])
+        self.assertEqual(
+            case['suggestion']['fields'], ['category', '-name'])
+
+    def test_primary_key_ordering(self):
+        cases = self.audit('--min-rows', '0', '--only', 'titles-list?')
+        for name in ('titles-list?ordering', 'titles-list?pagination=cursor'):
+            self.assertTrue(cases[name]['ok'], cases[name]['plan'])
+            self.assertIsNone(cases[name]['suggestion'])
+        self.assertEqual(
+            cases['titles-list?year']['suggestion']['fields'],
+            ['year', '-name']
+        )
@@ -0,0 +1,51 @@
+from api.metrics import registry
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from reviews.models import Category, Title
+
+from . import NO_CACHE
+
+
+@override_settings(CACHES=NO_CACHE)
+class MetricsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        Title.objects.create(name='Фильм', year=2000, category=category)
+
+    def setUp(self):
+        registry.reset()
+
+    def test_route_metrics(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('titles-list'))
+        stats = registry.collect()['titles-list']
+        self.assertEqual(stats.count, 1)
+        self.assertEqual(stats.statuses, {('GET', 200): 1})
+        self.assertEqual(stats.queries, len(context))
+        self.assertGreater(stats.sql_time, 0)
+        self.assertGreater(stats.serializer_time, 0)
+        self.assertEqual(stats.response_bytes, len(response.content))
+        self.assertEqual(sum(stats.buckets), 1)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('titles-list'))
+        self.client.get('/no-such-page/')
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn(
+            'yamdb_http_requests_total'
+            '{route="titles-list",method="GET",status="200"} 1',
+            text
+        )
+        self.assertIn(
+            'yamdb_http_request_duration_seconds_count'
+            '{route="titles-list"} 1',
+            text
+        )
+        self.assertIn('route="unmatched"', text)
+        self.assertIn('yamdb_api_cache_hits_total ', text)
@@ -0,0 +1,54 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from reviews.models import Review, Title
+from users.models import User
+
+from . import NO_CACHE
+
+
+@override_settings(CACHES=NO_CACHE)
+class CursorPaginationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Фильм', year=2000)
+        for i in range(7):
+            Review.objects.create(
+                title=cls.title,
+                author=User.objects.create(
+                    username=f'user{i}', email=f'u{i}@ya.ru'),
+                text='text',
+                score=5
+            )
+        cls.url = reverse('reviews-list', args=(cls.title.pk,))
+
+    def test_page_number_by_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['count'], 7)
+
+    def test_cursor_mode(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'pagination': 'cursor'})
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in context.captured_queries)
+        )
+        data = response.json()
+        self.assertNotIn('count', data)
+        ids = [review['id'] for review in data['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 5)
+        next_page = self.client.get(data['next']).json()
+        self.assertEqual(len(next_page['results']), 2)
+        self.assertLess(next_page['results'][0]['id'], ids[-1])
+
+    def test_cursor_mode_with_ordering_filter(self):
+        response = self.client.get(
+            reverse('titles-list'), {'pagination': 'cursor'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [title['id'] for title in response.json()['results']],
+            [self.title.pk]
+        )
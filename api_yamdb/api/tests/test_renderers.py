@@ -0,0 +1,77 @@
+import datetime
+import io
+import unittest
+from collections import OrderedDict
+from decimal import Decimal
+
+from api import renderers
+from api.renderers import FastJSONParser, FastJSONRenderer
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+PAYLOAD = {
+    'count': 2,
+    'next': 'http://testserver/api/v1/titles/?page=2',
+    'previous': None,
+    'results': ReturnList([
+        OrderedDict((
+            ('id', 1),
+            ('name', 'Крёстный отец'),
+            ('rating', Decimal('8.5')),
+            ('score', 4.333333333333333),
+            (
+                'pub_date', datetime.datetime(
+                    2021, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc
+                )
+            ),
+            ('year', datetime.date(1972, 3, 24)),
+            ('text', 'строка\u2028перевод\u2029'),
+            ('detail', gettext_lazy('Not found.')),
+            ('genre', ['drama', 'crime']),
+        )),
+    ], serializer=None),
+}
+
+
+class FastJSONRendererTest(SimpleTestCase):
+
+    def check_same_as_drf(self, backend):
+        with override_settings(JSON_BACKEND=backend):
+            self.assertEqual(
+                FastJSONRenderer().render(PAYLOAD),
+                JSONRenderer().render(PAYLOAD)
+            )
+
+    def test_stdlib(self):
+        self.check_same_as_drf('json')
+
+    @unittest.skipIf(renderers.orjson is None, 'orjson не установлен')
+    def test_orjson(self):
+        self.check_same_as_drf('orjson')
+
+    @unittest.skipIf(renderers.ujson is None, 'ujson не установлен')
+    def test_ujson(self):
+        self.check_same_as_drf('ujson')
+
+    def test_indent_uses_stdlib(self):
+        self.assertEqual(
+            FastJSONRenderer().render(
+                PAYLOAD, 'application/json; indent=2'
+            ),
+            JSONRenderer().render(PAYLOAD, 'application/json; indent=2')
+        )
+
+    @override_settings(JSON_BACKEND='auto')
+    def test_parse(self):
+        parser = FastJSONParser()
+        self.assertEqual(
+            parser.parse(io.BytesIO('{"name": "Фильм"}'.encode())),
+            {'name': 'Фильм'}
+        )
+        for content in (b'{"name": ', b'[NaN]'):
+            with self.assertRaises(ParseError):
+                parser.parse(io.BytesIO(content))
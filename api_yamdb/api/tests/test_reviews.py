@@ -0,0 +1,79 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from reviews.models import Comment, Review, Title
+from users.models import User
+
+from . import NO_CACHE
+
+
+@override_settings(CACHES=NO_CACHE)
+class ReviewCommentQueriesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Фильм', year=2000)
+        cls.other_title = Title.objects.create(name='Книга', year=2000)
+        cls.authors = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@ya.ru')
+            for i in range(4)
+        ]
+        cls.reviews = [
+            Review.objects.create(
+                title=cls.title, author=author, text='text', score=5)
+            for author in cls.authors
+        ]
+        for author in cls.authors:
+            Comment.objects.create(
+                review=cls.reviews[0], author=author, text='text')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.authors[1])
+
+    def test_reviews_list(self):
+        # ETag и страница; авторы выбираются вместе с отзывами.
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse('reviews-list', args=(self.title.pk,)))
+        self.assertEqual(response.json()['count'], 4)
+
+    def test_comments_list(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse(
+                'comments-list', args=(self.title.pk, self.reviews[0].pk)))
+        self.assertEqual(response.json()['count'], 4)
+
+    def test_empty_list_checks_parent(self):
+        response = self.client.get(
+            reverse('reviews-list', args=(self.other_title.pk,)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+        response = self.client.get(reverse('reviews-list', args=(0,)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_review_must_belong_to_title(self):
+        url = reverse(
+            'comments-list', args=(self.other_title.pk, self.reviews[0].pk))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.post(url, {'text': 'text'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.reviews[0].comments.count(), 4)
+
+    def test_create_comment(self):
+        url = reverse(
+            'comments-list', args=(self.title.pk, self.reviews[2].pk))
+        response = self.client.post(url, {'text': 'text'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['author'], 'user1')
+        self.assertEqual(response.json()['review'], self.reviews[2].pk)
+
+    def test_author_permission_without_author_query(self):
+        url = reverse(
+            'reviews-detail', args=(self.title.pk, self.reviews[1].pk))
+        response = self.client.patch(url, {'text': 'new'})
+        self.assertEqual(response.status_code, 200)
+        url = reverse(
+            'reviews-detail', args=(self.title.pk, self.reviews[2].pk))
+        response = self.client.patch(url, {'text': 'new'})
+        self.assertEqual(response.status_code, 403)
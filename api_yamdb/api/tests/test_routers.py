@@ -0,0 +1,72 @@
+from unittest import mock
+
+from api import routers
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from reviews.models import Title
+from users.models import User
+
+
+@override_settings(DB_REPLICAS=['replica'])
+class ReplicaRoutingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='user', email='u@ya.ru')
+        cls.title = Title.objects.create(name='Фильм', year=2000)
+        cls.reviews_url = reverse('reviews-list', args=(cls.title.pk,))
+
+    def setUp(self):
+        routers.caches[routers.API_CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Чтение из «реплики» None идёт в ту же тестовую базу.
+        patcher = mock.patch.object(
+            routers, 'choose_replica', return_value=None)
+        self.choose_replica = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_router(self):
+        router = routers.ReplicaRouter()
+        routers._state.alias = 'replica'
+        try:
+            self.assertEqual(router.db_for_read(Title), 'replica')
+            self.assertEqual(router.db_for_write(Title), 'default')
+        finally:
+            routers._state.alias = None
+        self.assertEqual(router.db_for_read(Title), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'reviews'))
+
+    def test_safe_requests_use_replica(self):
+        self.client.get(self.reviews_url)
+        self.client.get(reverse('genres-list'))
+        self.assertEqual(self.choose_replica.call_count, 2)
+        self.assertIsNone(routers.replica_alias())
+
+    def test_auth_and_users_use_primary(self):
+        self.client.get(reverse('users-me'))
+        self.client.post(reverse('token'), {'username': 'user'})
+        self.choose_replica.assert_not_called()
+
+    def test_reads_after_write_are_sticky(self):
+        response = self.client.post(
+            self.reviews_url, {'text': 'text', 'score': 7})
+        self.assertEqual(response.status_code, 201)
+        self.choose_replica.assert_not_called()
+        self.client.get(self.reviews_url)
+        self.choose_replica.assert_not_called()
+        other = APIClient()
+        other.get(self.reviews_url)
+        self.choose_replica.assert_called_once()
+
+    def test_sticky_cookie_without_shared_cache(self):
+        self.client.post(self.reviews_url, {'text': 'text', 'score': 7})
+        # Следующий запрос обслуживает воркер с другим кэшем.
+        routers.caches[routers.API_CACHE_ALIAS].clear()
+        self.client.get(self.reviews_url)
+        self.choose_replica.assert_not_called()
+        self.client.force_authenticate(
+            User.objects.create(username='other', email='o@ya.ru'))
+        self.client.get(self.reviews_url)
+        self.choose_replica.assert_called_once()
@@ -0,0 +1,150 @@
+from api.metrics import registry, render
+from api.throttling import LocalBuckets, consume, local_buckets
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from reviews.models import Review, Title
+from users.models import User
+
+from . import NO_CACHE
+
+RATES = {
+    'signup_ip': '3/hour',
+    'signup_username': '2/hour',
+    'token_ip': '3/hour',
+    'token_username': '2/hour',
+    'review': '1/hour',
+    'comment': '1/hour',
+}
+
+
+def rest_framework(**options):
+    return dict(settings.REST_FRAMEWORK, **options)
+
+
+class ConsumeTest(SimpleTestCase):
+
+    def test_bucket(self):
+        arrival = None
+        for _ in range(5):
+            arrival, wait = consume(arrival, 100.0, 5, 60)
+            self.assertEqual(wait, 0)
+        self.assertEqual(arrival, 160.0)
+        self.assertEqual(consume(arrival, 100.0, 5, 60), (None, 12.0))
+        # Через 12 секунд в корзине снова есть токен.
+        self.assertEqual(consume(arrival, 112.0, 5, 60), (172.0, 0))
+
+    @override_settings(THROTTLE_LOCAL_MAX_KEYS=4)
+    def test_prune_keeps_recent_buckets(self):
+        buckets = LocalBuckets()
+        for key in ('a', 'b', 'c', 'd', 'a', 'e'):
+            self.assertEqual(buckets.take(key, 100.0, 2, 60), 0)
+        # Пятый ключ: забыты b, c и d, к которым обращались раньше a.
+        self.assertNotEqual(buckets.take('a', 100.0, 2, 60), 0)
+        self.assertEqual(buckets.take('b', 100.0, 2, 60), 0)
+        self.assertEqual(buckets.take('b', 100.0, 2, 60), 0)
+
+
+@override_settings(
+    CACHES=NO_CACHE,
+    REST_FRAMEWORK=rest_framework(DEFAULT_THROTTLE_RATES=RATES)
+)
+class ThrottleTest(TestCase):
+
+    def setUp(self):
+        local_buckets.clear()
+        # Корзины с уменьшенными частотами не должны достаться
+        # другим тестам.
+        self.addCleanup(local_buckets.clear)
+        registry.reset()
+
+    def signup(self, username):
+        return self.client.post(reverse('signup'), {
+            'username': username, 'email': f'{username}@ya.ru'
+        })
+
+    def test_signup_username(self):
+        self.assertEqual(self.signup('bot').status_code, 200)
+        self.assertEqual(self.signup('bot').status_code, 200)
+        response = self.signup('BOT')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertIn(
+            'yamdb_throttle_rejections_total{scope="signup_username"} 1',
+            render()
+        )
+
+    def test_signup_ip(self):
+        for username in ('first', 'second', 'third'):
+            self.assertEqual(self.signup(username).status_code, 200)
+        self.assertEqual(self.signup('fourth').status_code, 429)
+        response = self.client.post(
+            reverse('signup'),
+            {'username': 'fourth', 'email': 'fourth@ya.ru'},
+            REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_spoofed_forwarded_for(self):
+        # nginx дописывает адрес клиента в конец X-Forwarded-For.
+        for username in ('first', 'second', 'third', 'fourth'):
+            response = self.client.post(
+                reverse('signup'),
+                {'username': username, 'email': f'{username}@ya.ru'},
+                HTTP_X_FORWARDED_FOR=f'10.1.0.{len(username)}, 10.0.0.3'
+            )
+        self.assertEqual(response.status_code, 429)
+
+    def test_review_create(self):
+        user = User.objects.create(username='user', email='u@ya.ru')
+        title = Title.objects.create(name='Фильм', year=2000)
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse('reviews-list', args=(title.pk,))
+        self.assertEqual(
+            client.post(url, {'text': 'a', 'score': 5}).status_code, 201
+        )
+        Review.objects.all().delete()
+        self.assertEqual(
+            client.post(url, {'text': 'b', 'score': 5}).status_code, 429
+        )
+        self.assertEqual(client.get(url).status_code, 200)
+
+    def test_review_bulk_not_throttled(self):
+        admin = User.objects.create(
+            username='admin', email='a@ya.ru', role=User.ROLE_ADMIN)
+        title = Title.objects.create(name='Фильм', year=2000)
+        client = APIClient()
+        client.force_authenticate(admin)
+        url = reverse('reviews-bulk', args=(title.pk,))
+        for _ in range(2):
+            response = client.post(
+                url, [{'author': 'admin', 'text': 'a', 'score': 5}],
+                format='json'
+            )
+            self.assertEqual(response.status_code, 201)
+            Review.objects.all().delete()
+        self.assertEqual(
+            client.post(
+                reverse('reviews-list', args=(title.pk,)),
+                {'text': 'b', 'score': 5}
+            ).status_code,
+            201
+        )
+
+    @override_settings(THROTTLE_SHARED=True, CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'throttle-tests',
+        }
+    })
+    def test_shared_bucket(self):
+        cache.clear()
+        self.assertEqual(self.signup('bot').status_code, 200)
+        # Другой воркер: своя корзина процесса, общая — в кэше.
+        local_buckets.clear()
+        self.assertEqual(self.signup('bot').status_code, 200)
+        local_buckets.clear()
+        self.assertEqual(self.signup('bot').status_code, 429)
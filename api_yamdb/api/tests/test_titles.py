@@ -0,0 +1,343 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from reviews.leaderboards import refresh_leaderboards
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+from . import NO_CACHE
+
+
+@override_settings(CACHES=NO_CACHE)
+class TitleQueriesTest(TestCase):
+    url = reverse('titles-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Фильм', slug='movie')
+        cls.genres = [
+            Genre.objects.create(name=name, slug=slug)
+            for name, slug in (('Драма', 'drama'), ('Комедия', 'comedy'))
+        ]
+
+    def create_titles(self, count):
+        for i in range(count):
+            title = Title.objects.create(
+                name=f'Фильм {i}', year=2000, category=self.category)
+            title.genre.set(self.genres)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(context), len(response.json()['results'])
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.create_titles(1)
+        small_queries, small_page = self.count_queries()
+        self.create_titles(4)
+        large_queries, large_page = self.count_queries()
+        self.assertLess(small_page, large_page)
+        self.assertEqual(small_queries, large_queries)
+
+    def test_detail_query_count(self):
+        self.create_titles(1)
+        title = Title.objects.get()
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse('titles-detail', args=(title.pk,)))
+        self.assertEqual(len(response.json()['genre']), 2)
+        self.assertEqual(response.json()['category']['slug'], 'movie')
+
+
+@override_settings(CACHES=NO_CACHE)
+class TitleSearchTest(TestCase):
+    url = reverse('titles-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        for name, description in (
+            ('Крёстный отец', 'Гангстерская сага'),
+            ('Отец солдата', 'Военная драма'),
+            ('Побег из Шоушенка', 'Драма о тюрьме'),
+        ):
+            Title.objects.create(
+                name=name, description=description, year=1970)
+
+    def search(self, query):
+        response = self.client.get(self.url, {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [title['name'] for title in response.json()['results']]
+
+    def test_search_by_name_prefix(self):
+        self.assertEqual(
+            sorted(self.search('отец')), ['Крёстный отец', 'Отец солдата'])
+        self.assertEqual(self.search('крёст'), ['Крёстный отец'])
+
+    def test_search_by_description(self):
+        self.assertEqual(self.search('тюрьме'), ['Побег из Шоушенка'])
+
+    def test_search_follows_title_changes(self):
+        title = Title.objects.get(name='Отец солдата')
+        title.name = 'Судьба человека'
+        title.save()
+        self.assertEqual(self.search('судьба'), ['Судьба человека'])
+        title.delete()
+        self.assertEqual(self.search('судьба'), [])
+
+
+@override_settings(CACHES=NO_CACHE)
+class TitleFilterTest(TestCase):
+    url = reverse('titles-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        movie = Category.objects.create(name='Фильм', slug='movie')
+        book = Category.objects.create(name='Книга', slug='book')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        Genre.objects.create(name='Драмеди', slug='dramedy')
+        for name, category, genres in (
+            ('Обе', movie, (drama, comedy)),
+            ('Драма', book, (drama,)),
+            ('Комедия', movie, (comedy,)),
+            ('Без жанра', None, ()),
+        ):
+            title = Title.objects.create(
+                name=name, year=2000, category=category)
+            title.genre.set(genres)
+
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_exact_slug(self):
+        self.assertEqual(self.names(genre='drama'), ['Драма', 'Обе'])
+        self.assertEqual(self.names(genre='dram'), [])
+        self.assertEqual(self.names(category='movie'), ['Комедия', 'Обе'])
+
+    def test_any_genre_without_duplicates(self):
+        self.assertEqual(
+            self.names(genre='drama,comedy'), ['Драма', 'Комедия', 'Обе'])
+        self.assertEqual(
+            self.names(genre='drama,unknown'), ['Драма', 'Обе'])
+        self.assertEqual(
+            self.names(category='movie, book'),
+            ['Драма', 'Комедия', 'Обе']
+        )
+
+    def test_all_genres(self):
+        self.assertEqual(
+            self.names(genre='drama,comedy', genre_match='all'), ['Обе'])
+        self.assertEqual(
+            self.names(genre='drama,unknown', genre_match='all'), [])
+
+    def test_slugs_resolved_once(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url, {'genre': 'drama', 'category': 'movie'})
+        lookups = [
+            query for query in context.captured_queries
+            if 'reviews_title' not in query['sql']
+            and '"slug" IN' in query['sql']
+        ]
+        self.assertEqual(len(lookups), 2)
+
+
+@override_settings(CACHES=NO_CACHE)
+class TitleFieldsetTest(TestCase):
+    url = reverse('titles-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        cls.title = Title.objects.create(
+            name='Фильм', year=2000, category=category,
+            description='Длинное описание'
+        )
+        cls.title.genre.set([Genre.objects.create(name='Драма', slug='drama')])
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        return response, [query['sql'] for query in context]
+
+    def test_fields(self):
+        response, queries = self.get(self.url, fields='id,name,year,rating')
+        self.assertEqual(
+            response.json()['results'],
+            [{'id': self.title.pk, 'name': 'Фильм', 'year': 2000,
+              'rating': None}]
+        )
+        self.assertNotIn('description', queries[-1])
+        self.assertNotIn('reviews_category', queries[-1])
+        self.assertFalse(any('reviews_genre' in sql for sql in queries))
+
+    def test_slugs_without_expand(self):
+        response, _ = self.get(
+            reverse('titles-detail', args=(self.title.pk,)),
+            fields='genre,category', expand=''
+        )
+        self.assertEqual(
+            response.json(), {'genre': ['drama'], 'category': 'movie'}
+        )
+
+    def test_expand(self):
+        response, _ = self.get(self.url, expand='category')
+        result = response.json()['results'][0]
+        self.assertEqual(result['genre'], ['drama'])
+        self.assertEqual(
+            result['category'], {'name': 'Фильм', 'slug': 'movie'}
+        )
+        self.assertEqual(result['description'], 'Длинное описание')
+
+    def test_unknown_values(self):
+        response, _ = self.get(self.url, fields='name,votes', expand='author')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'fields', 'expand'})
+        self.assertIn('Допустимые: id, name', response.json()['fields'][0])
+        response, _ = self.get(self.url, fields='bogus')
+        self.assertEqual(response.status_code, 400)
+
+    def test_empty_fields(self):
+        for fields in ('', ','):
+            response, _ = self.get(self.url, fields=fields)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(set(response.json()), {'fields'})
+
+    def test_etag_depends_on_fieldset(self):
+        url = reverse('titles-detail', args=(self.title.pk,))
+        full, _ = self.get(url)
+        sparse, _ = self.get(url, fields='name')
+        self.assertNotEqual(full['ETag'], sparse['ETag'])
+
+
+@override_settings(CACHES=NO_CACHE)
+class RatingStatsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Фильм', year=2000)
+        for score in (10, 10, 7):
+            author = User.objects.create(
+                username=f'user{score}{Review.objects.count()}',
+                email=f'{Review.objects.count()}@ya.ru'
+            )
+            Review.objects.create(
+                title=cls.title, author=author, text='Отзыв', score=score
+            )
+
+    def test_stats(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse('titles-rating-stats', args=(self.title.pk,))
+            )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['mean'], 9)
+        self.assertEqual(list(data['scores']), [str(i) for i in range(1, 11)])
+        self.assertEqual(data['scores']['10'], 2)
+        self.assertEqual(data['scores']['7'], 1)
+        self.assertEqual(data['scores']['1'], 0)
+
+    def test_title_without_reviews(self):
+        title = Title.objects.create(name='Новый', year=2000)
+        data = self.client.get(
+            reverse('titles-rating-stats', args=(title.pk,))
+        ).json()
+        self.assertEqual((data['total'], data['mean']), (0, None))
+
+    def test_unknown_title(self):
+        for pk in (0, 'abc'):
+            response = self.client.get(f'/api/v1/titles/{pk}/rating-stats/')
+            self.assertEqual(response.status_code, 404)
+
+
+@override_settings(CACHES=NO_CACHE, LEADERBOARD_MIN_REVIEWS=1)
+class LeaderboardApiTest(TestCase):
+    url = reverse('titles-top')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.genre = Genre.objects.create(name='Драма', slug='drama')
+        Category.objects.create(name='Фильм', slug='movie')
+        author = User.objects.create(username='author', email='a@ya.ru')
+        cls.titles = []
+        for i in range(7):
+            title = Title.objects.create(name=f'Фильм {i}', year=2000)
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=i + 1
+            )
+            cls.titles.append(title)
+        cls.titles[0].genre.set([cls.genre])
+        refresh_leaderboards(timezone.now())
+
+    def test_pages(self):
+        with self.assertNumQueries(2):
+            data = self.client.get(self.url).json()
+        self.assertEqual(data['board'], 'top')
+        self.assertIsNone(data['previous'])
+        self.assertEqual(
+            [entry['position'] for entry in data['results']],
+            [1, 2, 3, 4, 5]
+        )
+        self.assertEqual(
+            data['results'][0]['title'],
+            {'id': self.titles[6].pk, 'name': 'Фильм 6', 'year': 2000,
+             'rating': 7.0}
+        )
+        data = self.client.get(data['next']).json()
+        self.assertEqual(
+            [entry['title']['id'] for entry in data['results']],
+            [self.titles[1].pk, self.titles[0].pk]
+        )
+        self.assertIsNone(data['next'])
+        self.assertEqual(
+            data['previous'], f'http://testserver{self.url}?before=6'
+        )
+        data = self.client.get(data['previous']).json()
+        self.assertEqual(
+            [entry['position'] for entry in data['results']],
+            [1, 2, 3, 4, 5]
+        )
+        self.assertIsNone(data['previous'])
+        self.assertEqual(data['next'], f'http://testserver{self.url}?after=5')
+
+    def test_pages_after_title_deleted(self):
+        # Место удалённого произведения остаётся пустым до пересчёта.
+        self.titles[6].delete()
+        data = self.client.get(self.url).json()
+        self.assertEqual(
+            [entry['position'] for entry in data['results']],
+            [2, 3, 4, 5, 6]
+        )
+        data = self.client.get(data['next']).json()
+        self.assertEqual(
+            [entry['position'] for entry in data['results']], [7]
+        )
+
+    def test_scope(self):
+        data = self.client.get(
+            reverse('titles-trending'), {'genre': 'drama'}
+        ).json()
+        self.assertEqual(data['scope'], f'genre:{self.genre.pk}')
+        self.assertEqual(
+            [(entry['title']['id'], entry['value'])
+             for entry in data['results']],
+            [(self.titles[0].pk, 1)]
+        )
+        data = self.client.get(self.url, {'category': 'movie'}).json()
+        self.assertEqual(data['results'], [])
+
+    def test_errors(self):
+        for params, status in (
+            ({'genre': 'drama', 'category': 'movie'}, 400),
+            ({'genre': 'unknown'}, 404),
+            ({'after': 'abc'}, 404),
+            ({'before': '-1'}, 404),
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status, params)
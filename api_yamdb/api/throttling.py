@@ -0,0 +1,178 @@
+"""
+Ограничение частоты запросов корзиной токенов.
+
+Частоты задаются в REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] как в DRF:
+'5/hour' — корзина на 5 запросов, полностью пополняется за час.
+Состояние корзины — одно число, теоретическое время прихода следующего
+запроса (GCRA), поэтому проверка стоит одного чтения и одной записи.
+
+Сначала проверяется корзина процесса. При THROTTLE_SHARED запрос,
+пропущенный ею, проверяется ещё и корзиной в общем кэше, одной на все
+воркеры. Процесс видит часть запросов, поэтому его отказ означает
+отказ и общей корзины, и в кэш при этом не обращаются.
+"""
+import hashlib
+import threading
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from api_yamdb.settings import API_CACHE_ALIAS
+
+from .metrics import registry
+
+KEY = 'throttle:{}:{}'
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'5/hour' -> (5, 3600), как SimpleRateThrottle.parse_rate."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def consume(arrival, now, capacity, period):
+    """
+    Пара (новое время прихода, ожидание) для корзины с временем
+    прихода arrival. Ожидание 0 — запрос пропущен.
+    """
+    arrival = max(arrival or now, now) + period / capacity
+    if arrival - now > period:
+        return None, arrival - now - period
+    return arrival, 0
+
+
+class LocalBuckets:
+    """Корзины процесса."""
+
+    def __init__(self):
+        self._arrivals = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, now, capacity, period):
+        with self._lock:
+            arrival, wait = consume(
+                self._arrivals.get(key), now, capacity, period
+            )
+            if arrival is not None:
+                # Ключ переносится в конец: словарь упорядочен
+                # по последнему обращению.
+                self._arrivals.pop(key, None)
+                self._arrivals[key] = arrival
+            if len(self._arrivals) > settings.THROTTLE_LOCAL_MAX_KEYS:
+                self.prune(now)
+        return wait
+
+    def prune(self, now):
+        # Корзина, время прихода которой прошло, полна — её можно
+        # не хранить.
+        self._arrivals = {
+            key: arrival for key, arrival in self._arrivals.items()
+            if arrival > now
+        }
+        excess = len(self._arrivals) - settings.THROTTLE_LOCAL_MAX_KEYS // 2
+        if excess > 0:
+            # Ключей слишком много (перебор адресов): забываются те,
+            # к которым дольше всего не обращались. Половина места
+            # остаётся свободной, чтобы не чистить словарь на каждом
+            # запросе.
+            for key in list(islice(self._arrivals, excess)):
+                del self._arrivals[key]
+
+    def clear(self):
+        with self._lock:
+            self._arrivals.clear()
+
+
+class CacheBuckets:
+    """
+    Корзины в общем кэше. Чтение и запись не атомарны: при гонке
+    воркеров корзина может пропустить на несколько запросов больше.
+    """
+
+    def take(self, key, now, capacity, period):
+        cache = caches[API_CACHE_ALIAS]
+        arrival, wait = consume(cache.get(key), now, capacity, period)
+        if arrival is not None:
+            cache.set(key, arrival, int(arrival - now) + 1)
+        return wait
+
+
+local_buckets = LocalBuckets()
+cache_buckets = CacheBuckets()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Базовый класс: get_scope() и get_ident_key() задают частоту
+    и ключ корзины, None отключает проверку.
+    """
+
+    def get_scope(self, view):
+        return view.throttle_scope
+
+    def get_ident_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_time = None
+        scope = self.get_scope(view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        ident = self.get_ident_key(request, view)
+        if rate is None or ident is None:
+            return True
+        capacity, period = parse_rate(rate)
+        key = KEY.format(scope, ident)
+        now = time.time()
+        wait = local_buckets.take(key, now, capacity, period)
+        if not wait and settings.THROTTLE_SHARED:
+            wait = cache_buckets.take(key, now, capacity, period)
+        if not wait:
+            return True
+        self.wait_time = wait
+        registry.increment('throttle_rejections_total', scope)
+        return False
+
+    def wait(self):
+        return self.wait_time
+
+
+class IPThrottle(TokenBucketThrottle):
+    """Корзина на IP-адрес клиента: <throttle_scope>_ip."""
+
+    def get_scope(self, view):
+        return f'{view.throttle_scope}_ip'
+
+    def get_ident_key(self, request, view):
+        # С NUM_PROXIES — адрес, дописанный последним доверенным прокси;
+        # без него — весь X-Forwarded-For через ", ".
+        return self.get_ident(request).replace(' ', '')
+
+
+class UsernameThrottle(TokenBucketThrottle):
+    """Корзина на username из тела запроса: <throttle_scope>_username."""
+
+    def get_scope(self, view):
+        return f'{view.throttle_scope}_username'
+
+    def get_ident_key(self, request, view):
+        data = request.data
+        username = data.get('username') if hasattr(data, 'get') else None
+        if not isinstance(username, str) or not username:
+            return None
+        # Длина и символы ключа кэша ограничены (memcached).
+        return hashlib.sha1(username.lower().encode()).hexdigest()
+
+
+class UserCreateThrottle(TokenBucketThrottle):
+    """Корзина на пользователя для POST-запросов: <throttle_scope>."""
+
+    def get_ident_key(self, request, view):
+        if request.method != 'POST' or not request.user.is_authenticated:
+            return None
+        return request.user.pk
@@ -1,9 +1,10 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoriesListView, CommentViewSet, GenreListView,
-                    ObtainTokenView, RegisterUserAPIView, ReviewViewSet,
-                    TitleListView, UserViewSet)
+from .views import (CacheStatsView, CategoriesListView, CommentViewSet,
+                    ExportView, GenreListView, ObtainTokenView,
+                    RegisterUserAPIView, ReviewViewSet, TitleListView,
+                    UserViewSet)
 
 api_v1_router = DefaultRouter()
 api_v1_router.register('users', UserViewSet, basename='users')
@@ -29,4 +30,10 @@ auth_urls = [
 urlpatterns = [
     path('v1/', include(api_v1_router.urls)),
     path('v1/auth/', include(auth_urls)),
+    path('v1/cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    re_path(
+        r'^v1/export/(?P<resource>\w+)\.(?P<export_format>ndjson|csv)$',
+        ExportView.as_view(),
+        name='export'
+    ),
 ]
@@ -1,20 +1,78 @@
-from django.core.mail import send_mail
-from django.shortcuts import get_object_or_404
-from django.utils.crypto import get_random_string
-from users.models import User
+import base64
+import time
+
+from django.conf import settings
+from django.db.models import F
+from django.utils.crypto import (constant_time_compare, get_random_string,
+                                 salted_hmac)
+from users.models import OutboxEmail, User
 
 from api_yamdb.settings import AUTH_CONF_CODE_MAXLENGTH, EMAIL_CONFIRMATION
 
+SIGNED = 'signed'
+
+
+def code_window(now=None):
+    """Номер интервала времени длиной AUTH_CONF_CODE_TTL."""
+    return int((now or time.time()) // settings.AUTH_CONF_CODE_TTL)
+
+
+def signed_code(user, window):
+    digest = salted_hmac(
+        'api.utils.signed_code',
+        f'{user.pk}:{user.confirmation_nonce}:{window}'
+    ).digest()
+    return base64.b32encode(digest).decode()[
+        :settings.AUTH_SIGNED_CODE_LENGTH
+    ]
+
 
-def create_and_send_code(username):
-    user = get_object_or_404(User, username=username)
-    code = get_random_string(length=AUTH_CONF_CODE_MAXLENGTH)
-    user.confirmation_code = code
-    user.save()
-    send_mail(
-        'Код подтверждения',
-        f'Ваш код подтверждения для получения токена: {code}.',
-        EMAIL_CONFIRMATION,
-        [f'{user.email}'],
-        fail_silently=False,
+def create_and_send_code(user):
+    """
+    Ставит письмо с кодом подтверждения в очередь; в режиме legacy
+    код сохраняется. Письмо отправляет команда send_outbox, вызывать
+    внутри транзакции.
+    """
+    if settings.AUTH_CONF_CODE_MODE == SIGNED:
+        code = signed_code(user, code_window())
+    else:
+        code = get_random_string(length=AUTH_CONF_CODE_MAXLENGTH)
+        user.confirmation_code = code
+        user.save(update_fields=['confirmation_code'])
+    OutboxEmail.objects.create(
+        subject='Код подтверждения',
+        body=f'Ваш код подтверждения для получения токена: {code}.',
+        from_email=EMAIL_CONFIRMATION,
+        recipient=user.email,
     )
+
+
+def check_confirmation_code(user, code):
+    """
+    Код подходит пользователю. Сохранённые коды принимаются и в режиме
+    signed — коды, выданные до его включения, остаются в силе.
+    """
+    if user.confirmation_code and constant_time_compare(
+        code, user.confirmation_code
+    ):
+        return True
+    if settings.AUTH_CONF_CODE_MODE != SIGNED:
+        return False
+    window = code_window()
+    return any(
+        constant_time_compare(code, signed_code(user, previous))
+        for previous in (window, window - 1)
+    )
+
+
+def use_confirmation_code(user):
+    """
+    Гасит код одним обновлением строки пользователя. False — код уже
+    обменял параллельный запрос.
+    """
+    return bool(User.objects.filter(
+        pk=user.pk, confirmation_nonce=user.confirmation_nonce
+    ).update(
+        confirmation_code='',
+        confirmation_nonce=F('confirmation_nonce') + 1
+    ))
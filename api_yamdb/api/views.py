@@ -1,30 +1,58 @@
-from django.db import IntegrityError
-from django.db.models import Avg
+from functools import partial
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title
+from reviews.leaderboards import (SCOPE_ALL, category_scope, genre_scope,
+                                  leaderboard_page)
+from reviews.models import Category, Comment, Genre, Leaderboard, Review, Title
+from reviews.utils import title_rating_stats
 from users.models import User
 
 from api_yamdb.settings import ERR_EMAIL_EXISTS, ERR_USERNAME_EXISTS
 
-from .filter import TitleFilter
+from .authentication import access_token_for_user, load_full_user
+from .bulk import bulk_create_reviews, bulk_create_titles, bulk_response
+from .cache import CachedListMixin, CachedListRetrieveMixin, stats
+from .conditional import ConditionalRequestMixin, make_etag
+from .export import CONTENT_TYPES, EXPORTS, SOURCES, export_chunks
+from .filter import TitleFilter, TitleSearchFilter, split_slugs
+from .metrics import render
+from .pagination import PageNumberOrCursorPagination
 from .permissions import (AdminOrModeratorOrAuthor, AdminOrMyselfOnly,
                           AdminOrReadOnly)
-from .serializers import (CategoriesSerializer, CommentSerializer,
-                          GenreSerializer, GetTokenSerializer,
-                          RegisterSerializer, ReviewSerializer,
-                          TitleSerializer, UserSerializer)
-from .utils import create_and_send_code
+from .routers import ReplicaReadMixin
+from .serializers import (TITLE_EXPANDABLE, CategoriesSerializer,
+                          CommentSerializer, GenreSerializer,
+                          GetTokenSerializer, RegisterSerializer,
+                          ReviewSerializer, TitleSerializer, UserSerializer)
+from .throttling import IPThrottle, UserCreateThrottle, UsernameThrottle
+from .utils import create_and_send_code, use_confirmation_code
+
+# Действия, для которых ?fields= и ?expand= сужают ответ и выборку.
+SPARSE_ACTIONS = ('list', 'retrieve')
+
+# Курсоры страниц рейтингов: номер места, после или перед которым
+# начинается страница.
+LEADERBOARD_CURSOR_PARAMS = ('after', 'before')
+
+# Поля произведения в ответах рейтингов.
+LEADERBOARD_TITLE_FIELDS = ('id', 'name', 'year', 'rating')
 
 
 class CreateDestroyListViewSet(
+    ReplicaReadMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -36,58 +64,337 @@ class CreateDestroyListViewSet(
     lookup_field = 'slug'
 
 
-class TitleListView(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).all()
+class NestedResourceMixin:
+    """
+    Список вложенных объектов выбирается одним запросом по id
+    родителя; существование родителя проверяется, только если
+    список пуст.
+    """
+
+    def parent_exists(self):
+        raise NotImplementedError
+
+    def check_parent(self):
+        if not getattr(self, '_parent_checked', False):
+            if not self.parent_exists():
+                raise Http404
+            self._parent_checked = True
+
+    def check_empty_list(self):
+        self.check_parent()
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            self.check_empty_list()
+        return page
+
+
+class TitleListView(
+    ReplicaReadMixin,
+    CachedListRetrieveMixin,
+    ConditionalRequestMixin,
+    viewsets.ModelViewSet
+):
+    cache_resource = 'titles'
+    queryset = Title.objects.select_related(
+        'category').prefetch_related('genre')
     serializer_class = TitleSerializer
     permission_classes = (AdminOrReadOnly, )
-    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
+    filter_backends = (
+        DjangoFilterBackend, TitleSearchFilter, filters.OrderingFilter
+    )
     filterset_class = TitleFilter
     ordering_fields = ('id', )
+    pagination_class = PageNumberOrCursorPagination
+
+    @action(methods=['POST'], detail=False, url_path='bulk', url_name='bulk')
+    def bulk_create(self, request):
+        return bulk_response(request, bulk_create_titles)
+
+    @action(detail=True, url_path='rating-stats', url_name='rating-stats')
+    def rating_stats(self, request, pk):
+        """Распределение оценок из TitleScoreCount, без GROUP BY."""
+        try:
+            stats = title_rating_stats(int(pk))
+        except ValueError:
+            stats = None
+        if stats is None:
+            raise Http404
+        return Response(stats)
+
+    @action(detail=False, url_path='top', url_name='top')
+    def top(self, request):
+        return self.leaderboard_response(Leaderboard.TOP)
+
+    @action(detail=False, url_path='trending', url_name='trending')
+    def trending(self, request):
+        return self.leaderboard_response(Leaderboard.TRENDING)
+
+    def get_leaderboard_scope(self):
+        """Область рейтинга из ?genre= или ?category= (slug)."""
+        params = self.request.query_params
+        scopes = [
+            (model, make_scope, params[name])
+            for name, model, make_scope in (
+                ('genre', Genre, genre_scope),
+                ('category', Category, category_scope),
+            )
+            if name in params
+        ]
+        if not scopes:
+            return SCOPE_ALL
+        if len(scopes) > 1:
+            raise ValidationError(
+                {'Ошибка': 'Укажите жанр или категорию, но не оба.'}
+            )
+        model, make_scope, slug = scopes[0]
+        return make_scope(get_object_or_404(model, slug=slug).pk)
+
+    def get_leaderboard_cursor(self):
+        """Номера мест из ?after= (по умолчанию 0) и ?before=."""
+        params = self.request.query_params
+        cursor = {}
+        for name in LEADERBOARD_CURSOR_PARAMS:
+            if name not in params:
+                continue
+            try:
+                cursor[name] = int(params[name])
+            except ValueError:
+                raise NotFound('Неверный курсор.')
+            if cursor[name] < 0:
+                raise NotFound('Неверный курсор.')
+        return cursor.get('after', 0), cursor.get('before')
+
+    def leaderboard_response(self, board):
+        """
+        Страница рейтинга, рассчитанного refresh_leaderboards: места
+        читаются после ?after= или перед ?before= (номер места),
+        без COUNT и OFFSET.
+        """
+        scope = self.get_leaderboard_scope()
+        after, before = self.get_leaderboard_cursor()
+        leaderboard, entries, more = leaderboard_page(
+            board, scope, self.paginator.page_size, after, before
+        )
+        url = self.request.build_absolute_uri()
+        for name in LEADERBOARD_CURSOR_PARAMS:
+            url = remove_query_param(url, name)
+        next_url = previous_url = None
+        if before is None:
+            if more:
+                next_url = replace_query_param(
+                    url, 'after', entries[-1].position
+                )
+            if after:
+                previous_url = replace_query_param(
+                    url, 'before',
+                    entries[0].position if entries else after + 1
+                )
+        else:
+            next_url = replace_query_param(
+                url, 'after',
+                entries[-1].position if entries else max(before - 1, 0)
+            )
+            if more:
+                previous_url = replace_query_param(
+                    url, 'before', entries[0].position
+                )
+        titles = TitleSerializer(
+            [entry.title for entry in entries], many=True,
+            context=dict(
+                self.get_serializer_context(),
+                fields=LEADERBOARD_TITLE_FIELDS
+            )
+        ).data
+        return Response({
+            'board': board,
+            'scope': scope,
+            'refreshed_at': leaderboard and leaderboard.refreshed_at,
+            'next': next_url,
+            'previous': previous_url,
+            'results': [
+                {
+                    'position': entry.position,
+                    'value': entry.value,
+                    'title': title,
+                }
+                for entry, title in zip(entries, titles)
+            ],
+        })
+
+    def get_fieldset(self):
+        """
+        Поля ответа из ?fields= и вложенные объекты из ?expand=
+        (оба — через запятую). Без ?expand= жанры и категория вложены,
+        с пустым ?expand= — выводятся slug.
+        """
+        if getattr(self, '_fieldset', None) is None:
+            params = self.request.query_params
+            fields = TitleSerializer.Meta.fields
+            expand = TITLE_EXPANDABLE
+            errors = {}
+            for name, allowed in (('fields', fields), ('expand', expand)):
+                if name not in params:
+                    continue
+                values = split_slugs(params[name])
+                unknown = [value for value in values if value not in allowed]
+                if unknown:
+                    errors[name] = [
+                        f"Неизвестные значения: {', '.join(unknown)}. "
+                        f"Допустимые: {', '.join(allowed)}."
+                    ]
+                elif not values and name == 'fields':
+                    # Пустой ?expand= означает slug, пустой ?fields= —
+                    # ответ из пустых объектов.
+                    errors[name] = [
+                        'Не указано ни одного поля. '
+                        f"Допустимые: {', '.join(allowed)}."
+                    ]
+                if name == 'fields':
+                    fields = values
+                else:
+                    expand = values
+            if errors:
+                raise ValidationError(errors)
+            self._fieldset = (fields, expand)
+        return self._fieldset
+
+    def get_queryset(self):
+        if self.action not in SPARSE_ACTIONS:
+            return super().get_queryset()
+        fields, expand = self.get_fieldset()
+        # Читаются только столбцы выбранных полей; связанные таблицы
+        # присоединяются, только если поле запрошено.
+        columns = [name for name in fields if name not in TITLE_EXPANDABLE]
+        queryset = Title.objects.all()
+        if 'category' in fields:
+            queryset = queryset.select_related('category')
+            columns.extend(
+                f'category__{name}' for name in (
+                    CategoriesSerializer.Meta.fields
+                    if 'category' in expand else ('slug',)
+                )
+            )
+        if 'genre' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'genre', queryset=Genre.objects.only(
+                    *GenreSerializer.Meta.fields
+                    if 'genre' in expand else ('slug',)
+                )
+            ))
+        return queryset.only(*columns)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action not in SPARSE_ACTIONS:
+            return context
+        fields, expand = self.get_fieldset()
+        return dict(context, fields=fields, expand=expand)
+
+    def get_object_etag(self, lock=False):
+        etag = super().get_object_etag(lock)
+        if etag is None or self.action not in SPARSE_ACTIONS:
+            return etag
+        fields, expand = self.get_fieldset()
+        if tuple(fields) == TitleSerializer.Meta.fields and (
+            tuple(expand) == TITLE_EXPANDABLE
+        ):
+            # Полное представление: его ETag подходит для If-Match
+            # при изменении и удалении.
+            return etag
+        # Ответы с разными ?fields= и ?expand= — разные представления.
+        return make_etag(etag, fields, expand)
 
 
 class GenreListView(CreateDestroyListViewSet):
+    cache_resource = 'genres'
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
 
 
 class CategoriesListView(CreateDestroyListViewSet):
+    cache_resource = 'categories'
     queryset = Category.objects.all()
     serializer_class = CategoriesSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ReplicaReadMixin,
+    NestedResourceMixin,
+    CachedListRetrieveMixin,
+    ConditionalRequestMixin,
+    viewsets.ModelViewSet
+):
+    cache_resource = 'reviews'
+    cache_scope_kwarg = 'title_id'
     serializer_class = ReviewSerializer
     permission_classes = (AdminOrModeratorOrAuthor,)
+    throttle_classes = (UserCreateThrottle,)
+    throttle_scope = 'review'
+    pagination_class = PageNumberOrCursorPagination
 
     def get_queryset(self):
-        return get_object_or_404(
-            Title, pk=self.kwargs.get('title_id')
-        ).reviews.all()
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id')
+        ).select_related('author')
+
+    def parent_exists(self):
+        return Title.objects.filter(pk=self.kwargs.get('title_id')).exists()
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            title=get_object_or_404(
-                Title, pk=self.kwargs.get('title_id')
-            )
+        # Произведение уже найдено при проверке сериализатором.
+        serializer.save(author=self.request.user)
+
+    @action(
+        methods=['POST'],
+        detail=False,
+        permission_classes=(AdminOrMyselfOnly,),
+        # Загрузка администратора — не отзывы пользователя: корзина
+        # review на неё не тратится.
+        throttle_classes=(),
+        url_path='bulk',
+        url_name='bulk'
+    )
+    def bulk_create(self, request, title_id):
+        title = get_object_or_404(Title, pk=title_id)
+        return bulk_response(
+            request, partial(bulk_create_reviews, title)
         )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ReplicaReadMixin,
+    NestedResourceMixin,
+    CachedListRetrieveMixin,
+    ConditionalRequestMixin,
+    viewsets.ModelViewSet
+):
+    cache_resource = 'comments'
+    cache_scope_kwarg = 'review_id'
     serializer_class = CommentSerializer
     permission_classes = (AdminOrModeratorOrAuthor,)
+    throttle_classes = (UserCreateThrottle,)
+    throttle_scope = 'comment'
+    pagination_class = PageNumberOrCursorPagination
 
     def get_queryset(self):
-        return get_object_or_404(
-            Review, pk=self.kwargs.get('review_id')
-        ).comments.all()
+        return Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id')
+        ).select_related('author')
+
+    def parent_exists(self):
+        return Review.objects.filter(
+            pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id')
+        ).exists()
 
     def perform_create(self, serializer):
+        self.check_parent()
         serializer.save(
             author=self.request.user,
-            review=get_object_or_404(
-                Review, pk=self.kwargs.get('review_id'))
+            review_id=int(self.kwargs['review_id'])
         )
 
 
@@ -107,27 +414,33 @@ class UserViewSet(viewsets.ModelViewSet):
         url_name='me'
     )
     def retrieve_patch_me(self, request):
+        user = load_full_user(request.user)
         if request.method == 'PATCH':
             serializer = UserSerializer(
-                request.user, data=request.data, partial=True
+                user, data=request.data, partial=True
             )
             serializer.is_valid(raise_exception=True)
-            serializer.save(role=request.user.role)
+            serializer.save(role=user.role)
             return Response(serializer.data, status=status.HTTP_200_OK)
-        serializer = UserSerializer(request.user)
+        serializer = UserSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class RegisterUserAPIView(APIView):
     """Регистрация пользователя и получение кода подтверждения."""
 
+    throttle_classes = (IPThrottle, UsernameThrottle)
+    throttle_scope = 'signup'
+
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         try:
-            user, created = User.objects.get_or_create(
-                **serializer.validated_data
-            )
+            with transaction.atomic():
+                user, created = User.objects.get_or_create(
+                    **serializer.validated_data
+                )
+                create_and_send_code(user)
         except IntegrityError:
             email = serializer.validated_data.get('email')
             error = (
@@ -138,25 +451,85 @@ class RegisterUserAPIView(APIView):
                 {'Ошибка': error},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        create_and_send_code(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class ObtainTokenView(APIView):
     """Получение токена авторизации."""
 
+    throttle_classes = (IPThrottle, UsernameThrottle)
+    throttle_scope = 'token'
+
     def post(self, request):
         serializer = GetTokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        username = serializer.validated_data.get('username')
-        user = get_object_or_404(User, username=username)
-        if not user.confirmation_code:
+        user = serializer.validated_data['user']
+        if not use_confirmation_code(user):
             return Response(
                 {'Ошибка': 'Для получения токена пройдите авторизацию.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        refresh = RefreshToken.for_user(user)
-        token = {'token': str(refresh.access_token)}
-        user.confirmation_code = ''
-        user.save(update_fields=['confirmation_code'])
+        token = {'token': str(access_token_for_user(user))}
         return Response(token, status=status.HTTP_200_OK)
+
+
+class CacheStatsView(APIView):
+    """Счётчики попаданий в кэш ответов текущего процесса."""
+
+    permission_classes = (AdminOrMyselfOnly,)
+
+    def get(self, request):
+        return Response(stats.as_dict(), status=status.HTTP_200_OK)
+
+
+class ExportView(ReplicaReadMixin, APIView):
+    """
+    Потоковая выгрузка таблицы в NDJSON или CSV для аналитики.
+    ?since_id= — только записи с id больше указанного.
+    """
+
+    permission_classes = (AdminOrMyselfOnly,)
+
+    def perform_content_negotiation(self, request, force=False):
+        # Формат задан в адресе, ответ строится без рендерера.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, resource, export_format):
+        if resource not in EXPORTS:
+            raise Http404
+        try:
+            since_id = int(request.query_params.get('since_id', 0))
+        except ValueError:
+            since_id = -1
+        if since_id < 0:
+            raise ValidationError(
+                {'since_id': ['Должно быть целым неотрицательным числом.']}
+            )
+        # Курсор открывается уже после выхода из вью, поэтому база
+        # для чтения (реплика) выбирается сейчас.
+        model = SOURCES[EXPORTS[resource]].model
+        response = StreamingHttpResponse(
+            export_chunks(
+                resource, export_format, since_id,
+                using=router.db_for_read(model)
+            ),
+            content_type=CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{resource}.{export_format}"'
+        )
+        return response
+
+
+def metrics(request):
+    """Метрики процесса в текстовом формате Prometheus."""
+    cache = stats.as_dict()
+    return HttpResponse(
+        render(extra=(
+            ('api_cache_hits_total', 'counter',
+             'Попадания в кэш ответов API.', cache['hits']),
+            ('api_cache_misses_total', 'counter',
+             'Промахи кэша ответов API.', cache['misses']),
+        )),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,112 @@
+"""
+PostgreSQL с пулом соединений внутри процесса.
+
+Django закрывает соединение в конце запроса (CONN_MAX_AGE=0) или после
+истечения CONN_MAX_AGE; этот бэкенд вместо закрытия возвращает его
+в пул, а следующий запрос любого потока берёт готовое соединение.
+Одновременно открыто не больше POOL_SIZE соединений; если все заняты,
+поток ждёт POOL_TIMEOUT секунд.
+"""
+import threading
+import time
+from collections import deque
+
+from api.metrics import registry
+from django.conf import settings
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+Database = base.Database
+
+
+class ConnectionPool:
+
+    def __init__(self, size, timeout):
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        # deque.append() и pop() потокобезопасны.
+        self._idle = deque()
+
+    def acquire(self, connect):
+        """Соединение из пула и признак того, что оно открыто заново."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise Database.OperationalError(
+                'Все соединения пула заняты дольше '
+                f'{self.timeout} с.'
+            )
+        try:
+            while self._idle:
+                connection, released = self._idle.pop()
+                if self.is_usable(connection, released):
+                    return connection, False
+            return connect(), True
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def is_usable(self, connection, released):
+        if connection.closed:
+            return False
+        if time.monotonic() - released < settings.DB_HEALTH_CHECK_IDLE:
+            return True
+        try:
+            connection.cursor().execute('SELECT 1')
+        except Database.Error:
+            connection.close()
+            return False
+        return True
+
+    def release(self, connection):
+        try:
+            status = connection.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                connection.close()
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except Database.Error:
+            connection.close()
+        if not connection.closed:
+            self._idle.append((connection, time.monotonic()))
+        self._slots.release()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pooled = True
+    pools = {}
+    pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        if self.alias not in self.pools:
+            with self.pools_lock:
+                self.pools.setdefault(self.alias, ConnectionPool(
+                    self.settings_dict['POOL_SIZE'],
+                    self.settings_dict['POOL_TIMEOUT']
+                ))
+        return self.pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        connection, opened = self.pool.acquire(
+            lambda: Database.connect(**conn_params)
+        )
+        registry.increment(
+            'db_connections_opened_total' if opened
+            else 'db_connections_reused_total',
+            self.alias
+        )
+        # Как в родительском классе: уровень изоляции берётся
+        # из OPTIONS или у соединения.
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection)
@@ -24,6 +24,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,10 +69,76 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', 'postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'postgres'),
         'HOST': os.getenv('DB_HOST', 'db'),
-        'PORT': os.getenv('DB_PORT', '5432')
+        'PORT': os.getenv('DB_PORT', '5432'),
+        # Сколько секунд воркер держит соединение открытым между
+        # запросами; 0 — закрывать после каждого запроса.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+# Соединение, простоявшее без запросов дольше этого числа секунд,
+# проверяется перед запросом и переоткрывается, если база его закрыла.
+DB_HEALTH_CHECK_IDLE = int(os.getenv('DB_HEALTH_CHECK_IDLE', 30))
+
+# Пул соединений PostgreSQL внутри воркера: не больше DB_POOL_SIZE
+# соединений на процесс, закрытые Django соединения возвращаются в пул.
+# С пулом обычно ставят DB_CONN_MAX_AGE=0.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 0))
+if (
+    DB_POOL_SIZE
+    and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+):
+    DATABASES['default'].update(
+        ENGINE='api_yamdb.postgresql_pool',
+        POOL_SIZE=DB_POOL_SIZE,
+        POOL_TIMEOUT=float(os.getenv('DB_POOL_TIMEOUT', 10)),
+    )
+
+# Реплики для чтения: DB_REPLICA_HOSTS=replica1:5432,replica2
+# и/или DB_REPLICA_NAMES (для SQLite — пути к файлам копий).
+# Остальные параметры берутся у основной базы.
+DB_REPLICA_HOSTS = [
+    host for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host
+]
+DB_REPLICA_NAMES = [
+    name for name in os.getenv('DB_REPLICA_NAMES', '').split(',') if name
+]
+for index in range(max(len(DB_REPLICA_HOSTS), len(DB_REPLICA_NAMES))):
+    replica = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if index < len(DB_REPLICA_HOSTS):
+        host, _, port = DB_REPLICA_HOSTS[index].partition(':')
+        replica.update(HOST=host, PORT=port or replica['PORT'])
+    if index < len(DB_REPLICA_NAMES):
+        replica['NAME'] = DB_REPLICA_NAMES[index]
+    DATABASES[f'replica_{index + 1}'] = replica
+
+DB_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
+# Сколько секунд после записи чтения пользователя идут в основную базу.
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 5))
+
+# Кэш процесса LocMemCache виден только своему воркеру: для нескольких
+# воркеров нужен общий кэш, в docker-compose — memcached
+# (CACHE_BACKEND=django.core.cache.backends.memcached.MemcachedCache,
+# CACHE_LOCATION=memcached:11211).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'yamdb'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+    }
+}
+if CACHES['default']['BACKEND'].endswith('.LocMemCache'):
+    # LocMemCache вытесняет записи по LRU при достижении MAX_ENTRIES;
+    # клиенту memcached такой параметр не передаётся.
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -115,29 +182,88 @@ AUTH_EMAIL_MAXLENGTH = 254
 
 AUTH_CONF_CODE_MAXLENGTH = 5
 
+# Коды подтверждения: legacy — случайные, из AUTH_CONF_CODE_MAXLENGTH
+# символов, хранятся в User.confirmation_code; signed — HMAC от id
+# пользователя, его счётчика кодов и интервала времени, в базу
+# не записываются.
+AUTH_CONF_CODE_MODE = os.getenv('AUTH_CONF_CODE_MODE', 'legacy')
+
+AUTH_SIGNED_CODE_LENGTH = 8
+
+# Подписанный код действует от AUTH_CONF_CODE_TTL до удвоенного
+# AUTH_CONF_CODE_TTL секунд.
+AUTH_CONF_CODE_TTL = int(os.getenv('AUTH_CONF_CODE_TTL', 3600))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
-    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend']
+    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # Корзины токенов api.throttling: '<ёмкость>/<время пополнения>'.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': os.getenv('THROTTLE_SIGNUP_IP', '20/hour'),
+        'signup_username': os.getenv('THROTTLE_SIGNUP_USERNAME', '5/hour'),
+        'token_ip': os.getenv('THROTTLE_TOKEN_IP', '30/hour'),
+        'token_username': os.getenv('THROTTLE_TOKEN_USERNAME', '10/hour'),
+        'review': os.getenv('THROTTLE_REVIEW', '30/hour'),
+        'comment': os.getenv('THROTTLE_COMMENT', '120/hour'),
+    },
+    # Число прокси перед приложением (nginx): адрес клиента для
+    # ограничения частоты — последний адрес X-Forwarded-For, которому
+    # можно доверять.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
 }
 
+# Проверять корзины ещё и в общем кэше API_CACHE_ALIAS — нужно, когда
+# воркеров несколько и кэш общий (memcached, redis).
+THROTTLE_SHARED = os.getenv('THROTTLE_SHARED', 'False') == 'True'
+
+# Корзин в памяти процесса, после которого заполненные удаляются.
+THROTTLE_LOCAL_MAX_KEYS = int(os.getenv('THROTTLE_LOCAL_MAX_KEYS', 100000))
+
+# Библиотека JSON для API: auto (orjson или ujson, если установлены),
+# orjson, ujson или json (стандартная, вывод как у DRF).
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+
 SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24),
 }
 
+# Как долго процесс доверяет сведениям об изменении роли пользователя.
+AUTH_CLAIMS_CACHE_TTL = int(os.getenv('AUTH_CLAIMS_CACHE_TTL', 30))
+
+AUTH_CLAIMS_CACHE_SIZE = 10000
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 EMAIL_CONFIRMATION = 'admin@reviews.com'
 
+# Очередь писем: python manage.py send_outbox
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 100))
+
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8))
+
+OUTBOX_RETRY_DELAY = int(os.getenv('OUTBOX_RETRY_DELAY', 30))
+
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 2))
+
 TEXT_CUTTER_30 = 30
 
 TITLE_NAME_LENGTH = 300
@@ -148,6 +274,47 @@ SLUG_LENGTH = 50
 
 DEFAULT_SCORE_VALUE = 1
 
+# Пакетное создание: /titles/bulk/, /titles/{id}/reviews/bulk/
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', 1000))
+
+BULK_BATCH_SIZE = 500
+
+# Рейтинги /titles/top/ и /titles/trending/: python manage.py
+# refresh_leaderboards. Мест в каждом рейтинге.
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', 100))
+
+# Число отзывов, с которым средняя оценка произведения весит столько
+# же, сколько средняя оценка всех отзывов (байесовская оценка).
+LEADERBOARD_MIN_REVIEWS = int(os.getenv('LEADERBOARD_MIN_REVIEWS', 10))
+
+LEADERBOARD_TRENDING_DAYS = int(os.getenv('LEADERBOARD_TRENDING_DAYS', 7))
+
+LEADERBOARD_REFRESH_INTERVAL = int(
+    os.getenv('LEADERBOARD_REFRESH_INTERVAL', 300)
+)
+
+# Как часто сервис пересчитывает все рейтинги, а не только затронутые.
+LEADERBOARD_FULL_REFRESH_INTERVAL = int(
+    os.getenv('LEADERBOARD_FULL_REFRESH_INTERVAL', 86400)
+)
+
+# Строк в одном чтении курсора и в одной части потоковой выгрузки
+# /api/v1/export/ и команды export_data.
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+
+API_CACHE_ALIAS = 'default'
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 60))
+
+# ASGI (api_yamdb.asgi): потоки для чтений из api.asgi.READ_ROUTES
+# и для остальных запросов. Каждый поток держит своё соединение с базой.
+ASGI_READ_THREADS = int(os.getenv('ASGI_READ_THREADS', 8))
+
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 4))
+
+# Метрики запросов на /metrics (формат Prometheus).
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+
 ERR_EMAIL_EXISTS = 'Пользователь с таким email уже существует.'
 
 ERR_USERNAME_EXISTS = 'Пользователь с таким username уже существует.'
@@ -0,0 +1,18 @@
+"""
+Нагрузочные замеры API.
+
+    python -m benchmarks.generate --out bench_data --titles 100000 \
+        --reviews 10000000 --comments 20000000
+    python manage.py import_csv --path bench_data --clear
+    python -m benchmarks.harness --out results.json
+    python -m benchmarks.compare before.json after.json
+
+Запускать из каталога с manage.py.
+"""
+import os
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
@@ -0,0 +1,45 @@
+"""Сравнение двух результатов benchmarks.harness или benchmarks.http."""
+import argparse
+import json
+
+METRICS = ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'queries')
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def change(before, after):
+    if before in (None, 0) or after is None:
+        return ''
+    return f'{(after - before) / before * 100:+.1f}%'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    options = parser.parse_args(argv)
+    before, after = load(options.before), load(options.after)
+    print(
+        f"{before['meta']['revision']} -> {after['meta']['revision']} "
+        f"({after['meta'].get('database', after['meta'].get('base_url'))})"
+    )
+    for name, result in after['endpoints'].items():
+        previous = before['endpoints'].get(name)
+        if previous is None:
+            continue
+        print(name)
+        for metric in METRICS:
+            if metric not in result:
+                continue
+            old, new = previous.get(metric), result[metric]
+            print(
+                f'  {metric:15} {old!s:>10} -> {new!s:>10} '
+                f'{change(old, new)}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+Генератор синтетических данных в формате static/data/*.csv.
+
+Данные пишутся потоково, память не зависит от объёма. Популярность
+произведений и жанров распределена по закону Ципфа: несколько
+произведений собирают большую часть отзывов, у жанров длинный хвост.
+Результат загружается командой import_csv.
+"""
+import argparse
+import bisect
+import csv
+import itertools
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+CATEGORIES = ('Фильм', 'Книга', 'Музыка', 'Сериал', 'Игра', 'Спектакль')
+
+START_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+DATE_RANGE = timedelta(days=365 * 8).total_seconds()
+
+
+def zipf_weights(count, exponent):
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def split_total(total, weights, limit):
+    """Делит total пропорционально весам, не больше limit на элемент."""
+    total = min(total, limit * len(weights))
+    weight_sum = sum(weights)
+    counts = [
+        min(int(total * weight / weight_sum), limit) for weight in weights
+    ]
+    # Остаток от округления достаётся элементам с наибольшим весом.
+    order = sorted(range(len(weights)), key=lambda index: -weights[index])
+    rest = total - sum(counts)
+    position = 0
+    while rest > 0:
+        index = order[position]
+        if counts[index] < limit:
+            counts[index] += 1
+            rest -= 1
+        position = (position + 1) % len(order)
+    return counts
+
+
+class Generator:
+
+    def __init__(self, options):
+        self.options = options
+        self.rng = random.Random(options.seed)
+        self.out = options.out
+
+    def writer(self, filename, header):
+        file = open(
+            os.path.join(self.out, filename), 'w',
+            encoding='utf-8', newline=''
+        )
+        writer = csv.writer(file)
+        writer.writerow(header)
+        return file, writer
+
+    def date(self, after=None):
+        start = after or START_DATE
+        span = DATE_RANGE - (start - START_DATE).total_seconds()
+        return start + timedelta(seconds=self.rng.random() * max(span, 1))
+
+    @staticmethod
+    def iso(value):
+        return value.strftime('%Y-%m-%dT%H:%M:%S.') + (
+            f'{value.microsecond // 1000:03d}Z'
+        )
+
+    def run(self):
+        os.makedirs(self.out, exist_ok=True)
+        self.write_users()
+        self.write_catalogue()
+        self.write_titles()
+        self.write_reviews_and_comments()
+
+    def write_users(self):
+        file, writer = self.writer(
+            'users.csv',
+            ('id', 'username', 'email', 'role', 'bio',
+             'first_name', 'last_name')
+        )
+        with file:
+            for user_id in range(1, self.options.users + 1):
+                role = self.rng.choices(
+                    ('user', 'moderator', 'admin'), (0.98, 0.015, 0.005)
+                )[0]
+                writer.writerow((
+                    user_id, f'user{user_id}', f'user{user_id}@example.com',
+                    role, '', '', ''
+                ))
+
+    def write_catalogue(self):
+        file, writer = self.writer('category.csv', ('id', 'name', 'slug'))
+        with file:
+            for category_id, name in enumerate(CATEGORIES, 1):
+                writer.writerow(
+                    (category_id, name, f'category-{category_id}')
+                )
+        file, writer = self.writer('genre.csv', ('id', 'name', 'slug'))
+        with file:
+            for genre_id in range(1, self.options.genres + 1):
+                writer.writerow(
+                    (genre_id, f'Жанр {genre_id}', f'genre-{genre_id}')
+                )
+
+    def write_titles(self):
+        genre_ids = list(range(1, self.options.genres + 1))
+        genre_cumulative = list(itertools.accumulate(
+            zipf_weights(self.options.genres, 1.1)
+        ))
+        titles, title_writer = self.writer(
+            'titles.csv', ('id', 'name', 'year', 'category')
+        )
+        links, link_writer = self.writer(
+            'genre_title.csv', ('id', 'title_id', 'genre_id')
+        )
+        link_id = 0
+        with titles, links:
+            for title_id in range(1, self.options.titles + 1):
+                title_writer.writerow((
+                    title_id,
+                    f'Произведение {title_id}',
+                    self.rng.randint(1950, 2022),
+                    self.rng.randint(1, len(CATEGORIES)),
+                ))
+                genres = {
+                    genre_ids[bisect.bisect(
+                        genre_cumulative,
+                        self.rng.random() * genre_cumulative[-1]
+                    )]
+                    for _ in range(self.rng.randint(1, 3))
+                }
+                for genre_id in sorted(genres):
+                    link_id += 1
+                    link_writer.writerow((link_id, title_id, genre_id))
+
+    def write_reviews_and_comments(self):
+        options = self.options
+        per_title = split_total(
+            options.reviews,
+            zipf_weights(options.titles, options.skew),
+            options.users
+        )
+        # Номера произведений перемешиваются, чтобы популярные
+        # произведения не шли подряд по id.
+        title_ids = list(range(1, options.titles + 1))
+        self.rng.shuffle(title_ids)
+        # Веса комментариев по отзывам — экспоненциальные: у большинства
+        # отзывов комментариев мало, у немногих — много, а сумма точная.
+        per_review = split_total(
+            options.comments,
+            [self.rng.expovariate(1) for _ in range(sum(per_title))],
+            options.comments
+        )
+        reviews, review_writer = self.writer(
+            'review.csv',
+            ('id', 'title_id', 'text', 'author', 'score', 'pub_date')
+        )
+        comments, comment_writer = self.writer(
+            'comments.csv',
+            ('id', 'review_id', 'text', 'author', 'pub_date')
+        )
+        review_id = comment_id = 0
+        with reviews, comments:
+            for title_id, count in zip(title_ids, per_title):
+                authors = self.rng.sample(range(1, options.users + 1), count)
+                for author in authors:
+                    review_id += 1
+                    pub_date = self.date()
+                    review_writer.writerow((
+                        review_id, title_id, f'Отзыв {review_id}', author,
+                        min(10, max(1, round(self.rng.gauss(7, 2)))),
+                        self.iso(pub_date),
+                    ))
+                    for _ in range(per_review[review_id - 1]):
+                        comment_id += 1
+                        comment_writer.writerow((
+                            comment_id, review_id,
+                            f'Комментарий {comment_id}',
+                            self.rng.randint(1, options.users),
+                            self.iso(self.date(pub_date)),
+                        ))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--out', default='bench_data')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--genres', type=int, default=200)
+    parser.add_argument('--titles', type=int, default=10000)
+    parser.add_argument('--reviews', type=int, default=200000)
+    parser.add_argument('--comments', type=int, default=400000)
+    parser.add_argument(
+        '--skew', type=float, default=1.0,
+        help='Показатель Ципфа для популярности произведений.'
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    Generator(parse_args()).run()
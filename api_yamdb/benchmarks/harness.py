@@ -0,0 +1,226 @@
+"""
+Замер эндпоинтов api_v1_router: пропускная способность, задержки
+p50/p95/p99 и число SQL-запросов. Запросы выполняются в процессе
+через django.test.Client против базы из настроек.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from . import setup_django
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def sample_kwargs():
+    """
+    Параметры адресов по basename: (kwargs списка, kwargs объекта).
+    Берётся самое популярное произведение и его последний отзыв.
+    """
+    from reviews.models import Comment, Review, Title
+    from users.models import User
+
+    samples = {'titles': ({}, None), 'users': ({}, None)}
+    title = Title.objects.order_by('-reviews_count', 'id').first()
+    if title is None:
+        return samples
+    samples['titles'] = ({}, {'pk': title.pk})
+    review = Review.objects.filter(title=title).order_by('-id').first()
+    if review is not None:
+        samples['reviews'] = (
+            {'title_id': title.pk}, {'title_id': title.pk, 'pk': review.pk}
+        )
+        comment = Comment.objects.filter(review=review).first()
+        comments = {'title_id': title.pk, 'review_id': review.pk}
+        samples['comments'] = (
+            comments, dict(comments, pk=comment.pk) if comment else None
+        )
+    user = User.objects.order_by('id').first()
+    samples['users'] = ({}, {'username': user.username})
+    return samples
+
+
+def collect_endpoints(extra_queries):
+    """Все GET-эндпоинты роутера с подставленными параметрами."""
+    from api.urls import api_v1_router
+    from django.urls import reverse
+
+    samples = sample_kwargs()
+    endpoints = []
+    for prefix, viewset, basename in api_v1_router.registry:
+        list_kwargs, detail_kwargs = samples.get(basename, ({}, None))
+        for route in api_v1_router.get_routes(viewset):
+            if 'get' not in route.mapping:
+                continue
+            kwargs = detail_kwargs if route.detail else list_kwargs
+            if kwargs is None:
+                continue
+            name = route.name.format(basename=basename)
+            url = reverse(name, kwargs=kwargs)
+            endpoints.append((name, url))
+            if name == 'titles-list':
+                for query in extra_queries:
+                    endpoints.append((f'{name}?{query}', f'{url}?{query}'))
+    return endpoints
+
+
+def admin_headers():
+    from api.authentication import access_token_for_user
+    from users.models import User
+
+    admin, _ = User.objects.get_or_create(
+        username='benchmark-admin',
+        defaults={
+            'email': 'benchmark-admin@example.com',
+            'role': User.ROLE_ADMIN,
+        }
+    )
+    return {'HTTP_AUTHORIZATION': f'Bearer {access_token_for_user(admin)}'}
+
+
+def measure(url, headers, requests, concurrency):
+    from django.db import connection, connections
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    client = Client()
+    client.get(url, **headers)
+    with CaptureQueriesContext(connection) as context:
+        status = client.get(url, **headers).status_code
+    queries = len(context)
+
+    latencies = []
+    lock = threading.Lock()
+    per_worker = max(requests // concurrency, 1)
+
+    def worker():
+        worker_client = Client()
+        local = []
+        for _ in range(per_worker):
+            started = time.perf_counter()
+            worker_client.get(url, **headers)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+        if threading.current_thread() is not threading.main_thread():
+            connections.close_all()
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        worker()
+    else:
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        'url': url,
+        'status': status,
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'queries': queries,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--out', default='benchmark.json')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument(
+        '--cache', action='store_true',
+        help='Не отключать кэш ответов API.'
+    )
+    parser.add_argument(
+        '--only', action='append', default=[],
+        help='Замерять только эндпоинты, имя которых начинается так.'
+    )
+    parser.add_argument(
+        '--query', action='append',
+        default=[
+            'search=отец', 'genre=genre-1', 'pagination=cursor',
+            'fields=id,name,year,rating',
+        ],
+        help='Дополнительные параметры для titles-list.'
+    )
+    return parser.parse_args(argv)
+
+
+def run(options):
+    setup_django()
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    settings_override = {}
+    if not options.cache:
+        settings_override['CACHES'] = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+            }
+        }
+    results = {}
+    with override_settings(**settings_override):
+        headers = admin_headers()
+        for name, url in collect_endpoints(options.query):
+            if options.only and not any(
+                name.startswith(prefix) for prefix in options.only
+            ):
+                continue
+            results[name] = measure(
+                url, headers, options.requests, options.concurrency
+            )
+            print(
+                f"{name:40} {results[name]['throughput_rps']:>9} rps "
+                f"p95 {results[name]['p95_ms']} ms "
+                f"{results[name]['queries']} SQL",
+                file=sys.stderr
+            )
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'requests': options.requests,
+            'concurrency': options.concurrency,
+            'cache': options.cache,
+        },
+        'endpoints': results,
+    }
+    with open(options.out, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    run(parse_args())
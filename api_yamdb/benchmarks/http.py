@@ -0,0 +1,155 @@
+"""
+Замер работающего сервера по HTTP, например gunicorn с несколькими
+воркерами из docker-compose. Кроме задержек, по /metrics считается,
+сколько соединений с базой открыто и сколько использовано повторно.
+Метрики собираются воркером, который ответил на запрос /metrics,
+поэтому для точных чисел запускайте gunicorn с --workers 1
+или смотрите на их соотношение.
+
+    python -m benchmarks.http --base-url http://localhost \\
+        --metrics-url http://localhost:8000/metrics --out pool.json
+
+Отчёт совместим с benchmarks.compare.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from .harness import git_revision, percentile
+
+DEFAULT_PATHS = (
+    '/api/v1/titles/',
+    '/api/v1/genres/',
+    '/api/v1/categories/',
+)
+
+CONNECTION_COUNTERS = (
+    'yamdb_db_connections_opened_total',
+    'yamdb_db_connections_reused_total',
+)
+
+
+def get(url):
+    try:
+        with urlopen(url, timeout=30) as response:
+            response.read()
+            return response.status
+    except HTTPError as error:
+        return error.code
+
+
+def connection_counters(metrics_url):
+    """Суммы счётчиков соединений по всем базам или None."""
+    if not metrics_url:
+        return None
+    try:
+        with urlopen(metrics_url, timeout=30) as response:
+            text = response.read().decode()
+    except OSError:
+        return None
+    totals = dict.fromkeys(CONNECTION_COUNTERS, 0)
+    for line in text.splitlines():
+        name = line.split('{', 1)[0].split(' ', 1)[0]
+        if name in totals:
+            totals[name] += float(line.rsplit(' ', 1)[1])
+    return totals
+
+
+def measure(url, requests, concurrency):
+    status = get(url)
+    latencies = []
+    lock = threading.Lock()
+    per_worker = max(requests // concurrency, 1)
+
+    def worker():
+        local = []
+        for _ in range(per_worker):
+            started = time.perf_counter()
+            get(url)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        'url': url,
+        'status': status,
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--base-url', default='http://localhost')
+    parser.add_argument(
+        '--metrics-url',
+        help='Адрес /metrics воркера (nginx закрывает его снаружи).'
+    )
+    parser.add_argument('--out', default='benchmark-http.json')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument(
+        '--path', action='append', default=[],
+        help='Адрес для замера; по умолчанию списки API.'
+    )
+    return parser.parse_args(argv)
+
+
+def run(options):
+    before = connection_counters(options.metrics_url)
+    results = {}
+    for path in options.path or DEFAULT_PATHS:
+        results[path] = measure(
+            options.base_url.rstrip('/') + path,
+            options.requests, options.concurrency
+        )
+        print(
+            f"{path:40} {results[path]['throughput_rps']:>9} rps "
+            f"p95 {results[path]['p95_ms']} ms",
+            file=sys.stderr
+        )
+    after = connection_counters(options.metrics_url)
+    connections = None
+    if before is not None and after is not None:
+        connections = {
+            name[len('yamdb_db_'):]: after[name] - before[name]
+            for name in CONNECTION_COUNTERS
+        }
+        print(f'соединения: {connections}', file=sys.stderr)
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'base_url': options.base_url,
+            'requests': options.requests,
+            'concurrency': options.concurrency,
+            'connections': connections,
+        },
+        'endpoints': results,
+    }
+    with open(options.out, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,106 @@
+"""
+Микробенчмарк JSON: отрисовка и разбор страниц списков произведений
+и отзывов каждой установленной библиотекой (api.renderers).
+Данные берутся из базы и сериализуются один раз, замеряется только
+JSON.
+
+    python -m benchmarks.renderers --page-size 100 --out json.json
+"""
+import argparse
+import json
+import sys
+import timeit
+from io import BytesIO
+
+from . import setup_django
+
+
+def payloads(page_size):
+    """Ответы списков в том виде, в каком их получает рендерер."""
+    from api.serializers import ReviewSerializer, TitleSerializer
+    from rest_framework.utils.serializer_helpers import ReturnList
+    from reviews.models import Review, Title
+
+    titles = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    ).order_by('-id')[:page_size]
+    title = Title.objects.order_by('-reviews_count', 'id').first()
+    if title is None:
+        raise SystemExit(
+            'Нет данных: загрузите их (python -m benchmarks.generate '
+            'и import_csv).'
+        )
+    reviews = Review.objects.filter(title=title).select_related(
+        'author'
+    ).order_by('-id')[:page_size]
+
+    def page(serializer):
+        return {
+            'count': len(serializer.instance),
+            'next': None,
+            'previous': None,
+            'results': ReturnList(serializer.data, serializer=serializer),
+        }
+
+    return {
+        'titles-list': page(TitleSerializer(titles, many=True)),
+        'reviews-list': page(ReviewSerializer(reviews, many=True)),
+    }
+
+
+def run(options):
+    setup_django()
+    from api import renderers
+    from django.test.utils import override_settings
+
+    backends = [renderers.STDLIB] + [
+        name for name, module in renderers.BACKENDS.items()
+        if module is not None
+    ]
+    results = {}
+    for name, data in payloads(options.page_size).items():
+        expected = None
+        for backend in backends:
+            with override_settings(JSON_BACKEND=backend):
+                renderer = renderers.FastJSONRenderer()
+                parser = renderers.FastJSONParser()
+                content = renderer.render(data)
+                expected = expected or content
+                render_time = min(timeit.repeat(
+                    lambda: renderer.render(data),
+                    number=options.number, repeat=options.repeat
+                )) / options.number
+                parse_time = min(timeit.repeat(
+                    lambda: parser.parse(BytesIO(content)),
+                    number=options.number, repeat=options.repeat
+                )) / options.number
+            results.setdefault(name, {})[backend] = {
+                'bytes': len(content),
+                'identical': content == expected,
+                'render_us': round(render_time * 10 ** 6, 1),
+                'parse_us': round(parse_time * 10 ** 6, 1),
+            }
+            print(
+                f'{name:14} {backend:7} '
+                f"render {results[name][backend]['render_us']:>9} us "
+                f"parse {results[name][backend]['parse_us']:>9} us "
+                f"{len(content)} B "
+                f"{'' if content == expected else 'ОТЛИЧАЕТСЯ'}",
+                file=sys.stderr
+            )
+    with open(options.out, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--out', default='benchmark-json.json')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--number', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
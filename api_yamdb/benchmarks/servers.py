@@ -0,0 +1,174 @@
+"""
+Сравнение WSGI (gunicorn, синхронные воркеры) и ASGI (gunicorn
+с воркерами uvicorn) на одной базе: RPS, задержки и прирост памяти
+процессов сервера на одно одновременное соединение.
+
+    python -m benchmarks.servers --workers 2 --concurrency 64 \\
+        --out servers.json
+
+Сервер запускается с настройками из окружения (DB_ENGINE, DB_NAME...).
+Память считается по VmRSS из /proc, поэтому замер работает на Linux.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.request import urlopen
+
+from .harness import git_revision
+from .http import DEFAULT_PATHS, measure
+
+MODES = {
+    'wsgi': 'api_yamdb.wsgi:application',
+    'asgi': 'api_yamdb.asgi:application',
+}
+
+
+def process_tree_rss(pid):
+    """Суммарный VmRSS процесса и его потомков, байты."""
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as file:
+                # Имя процесса в скобках может содержать пробелы.
+                fields = file.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        parents.setdefault(int(fields[1]), []).append(int(entry))
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(parents.get(current, ()))
+        try:
+            with open(f'/proc/{current}/status') as file:
+                for line in file:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return total
+
+
+def wait_ready(server, url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(
+                f'Сервер завершился с кодом {server.returncode}.'
+            )
+        try:
+            with urlopen(url, timeout=5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Сервер не ответил на {url} за {timeout} с.')
+
+
+def run_mode(mode, options):
+    worker_class = options.asgi_worker if mode == 'asgi' else 'sync'
+    base_url = f'http://127.0.0.1:{options.port}'
+    server = subprocess.Popen((
+        # В gunicorn 20.0 нет python -m gunicorn.
+        sys.executable, '-c', 'from gunicorn.app.wsgiapp import run; run()',
+        MODES[mode],
+        '--bind', f'127.0.0.1:{options.port}',
+        '--workers', str(options.workers),
+        '--worker-class', worker_class,
+        '--log-level', 'warning',
+    ))
+    try:
+        paths = options.path or DEFAULT_PATHS
+        wait_ready(server, base_url + paths[0])
+        idle_rss = process_tree_rss(server.pid)
+        peak_rss = idle_rss
+        done = threading.Event()
+
+        def sample():
+            nonlocal peak_rss
+            while not done.wait(0.05):
+                peak_rss = max(peak_rss, process_tree_rss(server.pid))
+
+        sampler = threading.Thread(target=sample)
+        sampler.start()
+        try:
+            results = {
+                path: measure(
+                    base_url + path, options.requests, options.concurrency
+                )
+                for path in paths
+            }
+        finally:
+            done.set()
+            sampler.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+    for path, result in results.items():
+        print(
+            f"{mode} {path:30} {result['throughput_rps']:>9} rps "
+            f"p95 {result['p95_ms']} ms",
+            file=sys.stderr
+        )
+    memory = {
+        'idle_rss_mb': round(idle_rss / 2 ** 20, 1),
+        'peak_rss_mb': round(peak_rss / 2 ** 20, 1),
+        'kb_per_connection': round(
+            (peak_rss - idle_rss) / 1024 / options.concurrency, 1
+        ),
+    }
+    print(f'{mode} память: {memory}', file=sys.stderr)
+    return {'endpoints': results, 'memory': memory}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--out', default='benchmark-servers.json')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument(
+        '--asgi-worker', default='uvicorn.workers.UvicornWorker',
+        help=(
+            'Класс воркера ASGI; без uvloop и httptools — '
+            'uvicorn.workers.UvicornH11Worker.'
+        )
+    )
+    parser.add_argument(
+        '--mode', action='append', choices=tuple(MODES), default=[]
+    )
+    parser.add_argument(
+        '--path', action='append', default=[],
+        help='Адрес для замера; по умолчанию списки API.'
+    )
+    return parser.parse_args(argv)
+
+
+def run(options):
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'workers': options.workers,
+            'requests': options.requests,
+            'concurrency': options.concurrency,
+        },
+        'modes': {
+            mode: run_mode(mode, options)
+            for mode in options.mode or tuple(MODES)
+        },
+    }
+    with open(options.out, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    run(parse_args())
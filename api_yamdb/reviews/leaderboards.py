@@ -0,0 +1,242 @@
+"""
+Рейтинги произведений: лучшие за всё время и популярные сейчас,
+по всем произведениям, жанру или категории.
+
+Места хранятся в LeaderboardEntry и пересчитываются командой
+refresh_leaderboards; API читает места после заданного (курсор
+по месту), поэтому пропуски мест удалённых произведений не мешают.
+
+Лучшие — байесовская оценка (v * R + m * C) / (v + m): R и v —
+средний балл и число отзывов произведения, C — средний балл всех
+отзывов, m — LEADERBOARD_MIN_REVIEWS. Популярные — число отзывов
+за последние LEADERBOARD_TRENDING_DAYS дней. C меняется с каждым
+отзывом, но при частичном расчёте обновляются только затронутые
+области; refresh_leaderboards --full пересчитывает все.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (Count, ExpressionWrapper, F, FloatField, Max, Q,
+                              Sum)
+from django.db.models.functions import Cast
+
+from .models import (Category, Genre, Leaderboard, LeaderboardEntry,
+                     LeaderboardStaleScope, Review, Title, TitleGenre)
+
+SCOPE_ALL = 'all'
+
+
+def genre_scope(genre_id):
+    return f'genre:{genre_id}'
+
+
+def category_scope(category_id):
+    return f'category:{category_id}'
+
+
+def scope_title_ids(scope):
+    """Подзапрос id произведений области."""
+    kind, _, pk = scope.partition(':')
+    if kind == 'genre':
+        return TitleGenre.objects.filter(genre_id=pk).values('title_id')
+    titles = Title.objects.order_by()
+    if kind == 'category':
+        titles = titles.filter(category_id=pk)
+    return titles.values('pk')
+
+
+def all_scopes():
+    return (
+        {SCOPE_ALL}
+        | {
+            genre_scope(pk)
+            for pk in Genre.objects.values_list('pk', flat=True)
+        }
+        | {
+            category_scope(pk)
+            for pk in Category.objects.values_list('pk', flat=True)
+        }
+    )
+
+
+def title_scopes(title_ids):
+    """Области, в которые входят произведения."""
+    if not title_ids:
+        return set()
+    genres = TitleGenre.objects.filter(
+        title_id__in=title_ids
+    ).values_list('genre_id', flat=True).distinct()
+    categories = Title.objects.filter(
+        pk__in=title_ids, category__isnull=False
+    ).order_by().values_list('category_id', flat=True).distinct()
+    return (
+        {SCOPE_ALL}
+        | {genre_scope(pk) for pk in genres}
+        | {category_scope(pk) for pk in categories}
+    )
+
+
+def mark_stale(scopes):
+    """Области будут пересчитаны при следующем расчёте."""
+    LeaderboardStaleScope.objects.bulk_create(
+        LeaderboardStaleScope(scope=scope) for scope in scopes
+    )
+
+
+def mean_score():
+    """Средний балл всех отзывов (C)."""
+    totals = Title.objects.filter(reviews_count__gt=0).aggregate(
+        points=Sum(ExpressionWrapper(
+            F('rating') * F('reviews_count'), output_field=FloatField()
+        )),
+        reviews=Sum('reviews_count')
+    )
+    if not totals['reviews']:
+        return None
+    return totals['points'] / totals['reviews']
+
+
+def top_ranking(scope, now, mean):
+    """Пары (id произведения, байесовская оценка)."""
+    if mean is None:
+        return []
+    minimum = settings.LEADERBOARD_MIN_REVIEWS
+    return list(
+        Title.objects.filter(
+            pk__in=scope_title_ids(scope), reviews_count__gt=0
+        ).annotate(
+            value=ExpressionWrapper(
+                (F('reviews_count') * F('rating') + minimum * mean)
+                / (Cast('reviews_count', FloatField()) + minimum),
+                output_field=FloatField()
+            )
+        ).order_by('-value', 'pk').values_list(
+            'pk', 'value'
+        )[:settings.LEADERBOARD_SIZE]
+    )
+
+
+def trending_ranking(scope, now, mean):
+    """Пары (id произведения, число отзывов за окно)."""
+    reviews = Review.objects.filter(
+        pub_date__gt=now - timedelta(days=settings.LEADERBOARD_TRENDING_DAYS)
+    )
+    if scope != SCOPE_ALL:
+        reviews = reviews.filter(title_id__in=scope_title_ids(scope))
+    return list(
+        reviews.values('title_id').annotate(
+            value=Count('pk')
+        ).order_by('-value', 'title_id').values_list(
+            'title_id', 'value'
+        )[:settings.LEADERBOARD_SIZE]
+    )
+
+
+RANKINGS = {
+    Leaderboard.TOP: top_ranking,
+    Leaderboard.TRENDING: trending_ranking,
+}
+
+
+def changed_scopes(since, now):
+    """
+    Области каждого рейтинга, в которых с момента since могли
+    поменяться места. Title.updated меняется при изменении произведения
+    и при каждом изменении его отзывов (update_title_rating).
+    """
+    changed = set(
+        Title.objects.filter(updated__gt=since).values_list('pk', flat=True)
+    )
+    window = timedelta(days=settings.LEADERBOARD_TRENDING_DAYS)
+    # Новые отзывы и отзывы, вышедшие из окна с прошлого расчёта.
+    moved = set(
+        Review.objects.filter(
+            Q(pub_date__gt=since)
+            | Q(pub_date__gt=since - window, pub_date__lte=now - window)
+        ).values_list('title_id', flat=True).distinct()
+    )
+    return {
+        Leaderboard.TOP: title_scopes(changed),
+        Leaderboard.TRENDING: title_scopes(changed | moved),
+    }
+
+
+def write_leaderboard(board, scope, ranking, now):
+    with transaction.atomic():
+        leaderboard, _ = Leaderboard.objects.update_or_create(
+            board=board, scope=scope, defaults={'refreshed_at': now}
+        )
+        leaderboard.entries.all().delete()
+        LeaderboardEntry.objects.bulk_create(
+            LeaderboardEntry(
+                leaderboard=leaderboard, position=position,
+                title_id=title_id, value=value
+            )
+            for position, (title_id, value) in enumerate(ranking, 1)
+        )
+
+
+def refresh_leaderboards(now, full=False):
+    """
+    Пересчитывает рейтинги. Без full — только области, затронутые
+    изменениями с прошлого расчёта; первый расчёт всегда полный.
+    Возвращает число пересчитанных рейтингов.
+    """
+    since = Leaderboard.objects.aggregate(since=Max('refreshed_at'))['since']
+    # Отметки, сделанные во время расчёта, остаются до следующего.
+    stale = dict(LeaderboardStaleScope.objects.values_list('pk', 'scope'))
+    if full or since is None:
+        scopes = all_scopes()
+        Leaderboard.objects.exclude(scope__in=scopes).delete()
+        boards = {board: scopes for board in RANKINGS}
+    else:
+        boards = changed_scopes(since, now)
+        if stale:
+            scopes = all_scopes()
+            # Рейтинги удалённых жанров и категорий.
+            Leaderboard.objects.filter(
+                scope__in=set(stale.values()) - scopes
+            ).delete()
+            for board in boards:
+                boards[board] |= set(stale.values()) & scopes
+    mean = mean_score()
+    refreshed = 0
+    for board, scopes in boards.items():
+        for scope in sorted(scopes):
+            write_leaderboard(
+                board, scope, RANKINGS[board](scope, now, mean), now
+            )
+            refreshed += 1
+    # Время расчёта — начало прохода: изменения, сделанные во время
+    # него, попадут в следующий.
+    Leaderboard.objects.update(refreshed_at=now)
+    LeaderboardStaleScope.objects.filter(pk__in=stale).delete()
+    return refreshed
+
+
+def leaderboard_page(board, scope, size, after=0, before=None):
+    """
+    Рейтинг, до size его мест после места after (или перед местом
+    before) и есть ли ещё места в том же направлении.
+    """
+    leaderboard = Leaderboard.objects.filter(board=board, scope=scope).first()
+    if leaderboard is None:
+        return None, [], False
+    if before is None:
+        entries = leaderboard.entries.filter(position__gt=after)
+    else:
+        entries = leaderboard.entries.filter(
+            position__lt=before
+        ).order_by('-position')
+    entries = list(
+        entries.select_related('title').only(
+            'leaderboard', 'position', 'value', 'title', 'title__name',
+            'title__year', 'title__rating'
+        )[:size + 1]
+    )
+    more = len(entries) > size
+    entries = entries[:size]
+    if before is not None:
+        entries.reverse()
+    return leaderboard, entries, more
@@ -0,0 +1,360 @@
+import csv
+import io
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from api.cache import bump_all_versions
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from reviews.models import (Category, Comment, Genre, Leaderboard,
+                            LeaderboardEntry, LeaderboardStaleScope, Review,
+                            Title, TitleGenre, TitleScoreCount)
+from reviews.search import rebuild_search_index
+from reviews.utils import rebuild_score_counts, rebuild_title_ratings
+from users.models import User
+
+DEFAULT_BATCH_SIZE = 5000
+
+COPY_NULL = r'\N'
+
+Source = namedtuple('Source', ('filename', 'model', 'columns', 'foreign_keys'))
+
+# Файлы внутри одного этапа не зависят друг от друга
+# и загружаются параллельно.
+STAGES = (
+    (
+        Source('users.csv', User, {
+            'id': 'id',
+            'username': 'username',
+            'email': 'email',
+            'role': 'role',
+            'bio': 'bio',
+            'first_name': 'first_name',
+            'last_name': 'last_name',
+        }, {}),
+        Source('genre.csv', Genre, {
+            'id': 'id', 'name': 'name', 'slug': 'slug'
+        }, {}),
+        Source('category.csv', Category, {
+            'id': 'id', 'name': 'name', 'slug': 'slug'
+        }, {}),
+    ),
+    (
+        Source('titles.csv', Title, {
+            'id': 'id', 'name': 'name', 'year': 'year',
+            'category_id': 'category',
+        }, {'category_id': Category}),
+    ),
+    (
+        Source('genre_title.csv', TitleGenre, {
+            'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id'
+        }, {'title_id': Title, 'genre_id': Genre}),
+        Source('review.csv', Review, {
+            'id': 'id', 'title_id': 'title_id', 'text': 'text',
+            'author_id': 'author', 'score': 'score', 'pub_date': 'pub_date',
+        }, {'title_id': Title, 'author_id': User}),
+    ),
+    (
+        Source('comments.csv', Comment, {
+            'id': 'id', 'review_id': 'review_id', 'text': 'text',
+            'author_id': 'author', 'pub_date': 'pub_date',
+        }, {'review_id': Review, 'author_id': User}),
+    ),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает данные из csv-файлов пакетами. '
+        'На PostgreSQL используется COPY, независимые файлы '
+        'загружаются параллельно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Каталог с csv-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одной вставке.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=3,
+            help='Количество файлов, загружаемых одновременно.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольных точек. Если он существует, '
+                 'загрузка продолжается с места остановки.'
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить существующие данные перед загрузкой.'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY даже на PostgreSQL.'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        self.path = options['path']
+        self.batch_size = options['batch_size']
+        self.database = options['database']
+        connection = connections[self.database]
+        self.use_copy = (
+            connection.vendor == 'postgresql' and not options['no_copy']
+        )
+        # SQLite допускает только одного пишущего.
+        self.workers = (
+            1 if connection.vendor == 'sqlite' else max(options['workers'], 1)
+        )
+        self.lock = threading.Lock()
+        self.started = timezone.now()
+        self.checkpoint_path = options['checkpoint']
+        if options['clear']:
+            self.clear()
+            if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+                os.remove(self.checkpoint_path)
+        self.checkpoint = self.load_checkpoint()
+
+        for stage in STAGES:
+            sources = [
+                source for source in stage
+                if os.path.exists(os.path.join(self.path, source.filename))
+            ]
+            known_ids = self.load_known_ids(sources)
+            if self.workers == 1 or len(sources) == 1:
+                for source in sources:
+                    self.import_source(source, known_ids)
+            else:
+                with ThreadPoolExecutor(self.workers) as executor:
+                    futures = [
+                        executor.submit(
+                            self.import_source_in_thread, source, known_ids
+                        )
+                        for source in sources
+                    ]
+                    for future in futures:
+                        future.result()
+
+        self.reset_sequences()
+        rebuild_title_ratings(self.database)
+        rebuild_score_counts(self.database)
+        rebuild_search_index(self.database)
+        # Сигналы при загрузке не отправляются: закэшированные ответы
+        # API устаревают все сразу.
+        bump_all_versions()
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена.'))
+
+    def clear(self):
+        connection = connections[self.database]
+        quote_name = connection.ops.quote_name
+        # Распределение оценок и рейтинги ссылаются на произведения
+        # и удаляются первыми.
+        content_models = [
+            TitleScoreCount, LeaderboardEntry, Leaderboard,
+            LeaderboardStaleScope
+        ] + [
+            source.model for stage in reversed(STAGES)
+            for source in reversed(stage) if source.model is not User
+        ]
+        with transaction.atomic(using=self.database):
+            with connection.cursor() as cursor:
+                for model in content_models:
+                    cursor.execute(
+                        f'DELETE FROM {quote_name(model._meta.db_table)}'
+                    )
+            # Пользователи удаляются через ORM: на них ссылаются
+            # таблицы, которые не загружаются из csv.
+            User.objects.using(self.database).all().delete()
+
+    def load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(
+            self.checkpoint_path
+        ):
+            return {}
+        with open(self.checkpoint_path, encoding='utf-8') as file:
+            return json.load(file)
+
+    def save_checkpoint(self, filename, rows):
+        if not self.checkpoint_path:
+            return
+        with self.lock:
+            self.checkpoint[filename] = rows
+            tmp_path = f'{self.checkpoint_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(self.checkpoint, file)
+            os.replace(tmp_path, self.checkpoint_path)
+
+    def load_known_ids(self, sources):
+        models = {
+            model for source in sources
+            for model in source.foreign_keys.values()
+        }
+        return {
+            model: set(
+                model.objects.using(self.database)
+                .values_list('pk', flat=True).iterator()
+            )
+            for model in models
+        }
+
+    def import_source_in_thread(self, source, known_ids):
+        try:
+            self.import_source(source, known_ids)
+        finally:
+            connections[self.database].close()
+
+    def import_source(self, source, known_ids):
+        done = self.checkpoint.get(source.filename, 0)
+        if done is True:
+            self.write(f'{source.filename}: уже загружен, пропуск.')
+            return
+        model = source.model
+        fields = model._meta.concrete_fields
+        imported = skipped = 0
+        # Контрольная точка пишется после фиксации пакета: при обрыве
+        # между ними первый пакет после неё уже может быть в базе.
+        recheck = bool(self.checkpoint_path)
+        started = time.monotonic()
+        with open(
+            os.path.join(self.path, source.filename), encoding='utf-8'
+        ) as file:
+            rows = islice(csv.DictReader(file), done, None)
+            while True:
+                chunk = list(islice(rows, self.batch_size))
+                if not chunk:
+                    break
+                batch = []
+                for row in chunk:
+                    obj = self.build_object(source, row, known_ids)
+                    if obj is None:
+                        skipped += 1
+                    else:
+                        batch.append(obj)
+                if recheck:
+                    batch = self.without_existing(model, batch)
+                    recheck = False
+                if batch:
+                    with transaction.atomic(using=self.database):
+                        self.insert(model, fields, batch)
+                    imported += len(batch)
+                done += len(chunk)
+                self.save_checkpoint(source.filename, done)
+                self.report(source.filename, imported, started)
+        self.save_checkpoint(source.filename, True)
+        if skipped:
+            self.write(
+                f'{source.filename}: пропущено строк с неизвестными '
+                f'связями: {skipped}'
+            )
+
+    def without_existing(self, model, objs):
+        # id из csv — строки.
+        to_python = model._meta.pk.to_python
+        existing = set(
+            model.objects.using(self.database).filter(
+                pk__in=[obj.pk for obj in objs]
+            ).values_list('pk', flat=True)
+        )
+        return [obj for obj in objs if to_python(obj.pk) not in existing]
+
+    def build_object(self, source, row, known_ids):
+        values = {
+            attname: row[column]
+            for attname, column in source.columns.items()
+        }
+        # Пустая строка в csv — NULL (так его пишет выгрузка export_data).
+        meta = source.model._meta
+        for attname, value in values.items():
+            if value == '' and meta.get_field(attname).null:
+                values[attname] = None
+        for attname, model in source.foreign_keys.items():
+            if not values[attname]:
+                values[attname] = None
+            elif int(values[attname]) not in known_ids[model]:
+                return None
+        obj = source.model(**values)
+        # Вставка идёт в обход pre_save, поэтому auto_now-поля
+        # заполняются здесь.
+        for field in source.model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False):
+                setattr(obj, field.attname, self.started)
+        return obj
+
+    def insert(self, model, fields, objs):
+        if self.use_copy:
+            self.copy(model, fields, objs)
+            return
+        connection = connections[self.database]
+        step = max(connection.ops.bulk_batch_size(fields, objs), 1)
+        for start in range(0, len(objs), step):
+            # raw=True, как при loaddata: pub_date из файла
+            # не перезаписывается auto_now_add.
+            model._base_manager._insert(
+                objs[start:start + step],
+                fields=fields,
+                raw=True,
+                using=self.database
+            )
+
+    def copy(self, model, fields, objs):
+        connection = connections[self.database]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objs:
+            writer.writerow([
+                COPY_NULL if value is None else value
+                for value in (
+                    field.get_db_prep_save(
+                        getattr(obj, field.attname), connection
+                    )
+                    for field in fields
+                )
+            ])
+        buffer.seek(0)
+        quote_name = connection.ops.quote_name
+        columns = ', '.join(quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {quote_name(model._meta.db_table)} ({columns}) '
+                f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                buffer
+            )
+
+    def reset_sequences(self):
+        connection = connections[self.database]
+        models = [source.model for stage in STAGES for source in stage]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if not statements:
+            return
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def report(self, filename, imported, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.write(
+            f'{filename}: {imported} строк, {imported / elapsed:.0f} строк/с'
+        )
+
+    def write(self, message):
+        with self.lock:
+            self.stdout.write(message)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.utils import rebuild_score_counts, rebuild_title_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг, число отзывов и распределение оценок '
+        'всех произведений.'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = rebuild_title_ratings()
+            buckets = rebuild_score_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено произведений: {updated}, '
+            f'строк распределения оценок: {buckets}'
+        ))
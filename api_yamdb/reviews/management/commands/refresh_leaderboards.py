@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from reviews.leaderboards import refresh_leaderboards
+
+from api_yamdb.settings import (LEADERBOARD_FULL_REFRESH_INTERVAL,
+                                LEADERBOARD_REFRESH_INTERVAL)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинги лучших и популярных произведений '
+        'в областях, затронутых изменениями с прошлого расчёта, '
+        'и все рейтинги раз в LEADERBOARD_FULL_REFRESH_INTERVAL секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Пересчитать один раз и завершиться.'
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать все рейтинги и удалить лишние.'
+        )
+
+    def handle(self, *args, **options):
+        full = options['full']
+        next_full = time.monotonic() + LEADERBOARD_FULL_REFRESH_INTERVAL
+        while True:
+            refreshed = refresh_leaderboards(timezone.now(), full=full)
+            self.stdout.write(f'Пересчитано рейтингов: {refreshed}')
+            if options['once']:
+                break
+            time.sleep(LEADERBOARD_REFRESH_INTERVAL)
+            # Средний балл всех отзывов меняется и в областях,
+            # которых изменения не коснулись.
+            full = time.monotonic() >= next_full
+            if full:
+                next_full = (
+                    time.monotonic() + LEADERBOARD_FULL_REFRESH_INTERVAL
+                )
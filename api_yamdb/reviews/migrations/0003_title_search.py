@@ -0,0 +1,61 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARD = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'ALTER TABLE reviews_title ADD COLUMN search_vector tsvector',
+    "UPDATE reviews_title SET search_vector = to_tsvector("
+    "'pg_catalog.russian', coalesce(name, '') || ' ' || "
+    "coalesce(description, ''))",
+    'CREATE INDEX reviews_title_search_vector_gin '
+    'ON reviews_title USING gin (search_vector)',
+    'CREATE INDEX reviews_title_name_trgm '
+    'ON reviews_title USING gin (name gin_trgm_ops)',
+    'CREATE TRIGGER reviews_title_search_vector_update '
+    'BEFORE INSERT OR UPDATE OF name, description ON reviews_title '
+    'FOR EACH ROW EXECUTE PROCEDURE tsvector_update_trigger('
+    "search_vector, 'pg_catalog.russian', name, description)",
+)
+
+POSTGRESQL_BACKWARD = (
+    'DROP TRIGGER IF EXISTS reviews_title_search_vector_update '
+    'ON reviews_title',
+    'DROP INDEX IF EXISTS reviews_title_name_trgm',
+    'ALTER TABLE reviews_title DROP COLUMN IF EXISTS search_vector',
+)
+
+SQLITE_FORWARD = (
+    'CREATE VIRTUAL TABLE reviews_title_fts USING fts5(name, description)',
+    'INSERT INTO reviews_title_fts (rowid, name, description) '
+    'SELECT id, name, description FROM reviews_title',
+)
+
+SQLITE_BACKWARD = (
+    'DROP TABLE IF EXISTS reviews_title_fts',
+)
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_rating'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({
+                'postgresql': POSTGRESQL_FORWARD,
+                'sqlite': SQLITE_FORWARD,
+            }),
+            run_for_vendor({
+                'postgresql': POSTGRESQL_BACKWARD,
+                'sqlite': SQLITE_BACKWARD,
+            }),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:32
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicates(apps, schema_editor):
+    TitleGenre = apps.get_model('reviews', 'TitleGenre')
+    duplicates = TitleGenre.objects.using(
+        schema_editor.connection.alias
+    ).values('title_id', 'genre_id').annotate(
+        first_id=Min('id'), count=Count('id')
+    ).filter(count__gt=1)
+    for row in duplicates:
+        TitleGenre.objects.using(schema_editor.connection.alias).filter(
+            title_id=row['title_id'], genre_id=row['genre_id']
+        ).exclude(id=row['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_row_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='titlegenre',
+            index=models.Index(fields=['genre', 'title'], name='titlegenre_genre_title_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titlegenre',
+            constraint=models.UniqueConstraint(fields=('title', 'genre'), name='unique_title_genre'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_leaderboards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardStaleScope',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=32, verbose_name='Область')),
+            ],
+            options={
+                'verbose_name': 'Область к пересчёту рейтингов',
+                'verbose_name_plural': 'Области к пересчёту рейтингов',
+            },
+        ),
+    ]
@@ -1,7 +1,7 @@
 from api.validators import validate_year
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 
 
 class AbstractCategoryGenreModel(models.Model):
@@ -34,10 +34,16 @@ class AbstractReviewCommentModel(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
         abstract = True
-        ordering = ('-id', '-pub_date', )
+        # id растёт вместе с pub_date, второй ключ сортировки
+        # не позволил бы использовать индекс (родитель, -id).
+        ordering = ('-id', )
 
     def __str__(self):
         return self.text[:settings.TEXT_CUTTER_30]
@@ -84,11 +90,29 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Категория'
     )
+    rating = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Рейтинг'
+    )
+    reviews_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов'
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('-name',)
+        indexes = [
+            models.Index(fields=['name'], name='title_name_idx'),
+        ]
 
     def __str__(self):
         return self.name[:settings.TEXT_CUTTER_30]
@@ -109,6 +133,19 @@ class TitleGenre(models.Model):
     class Meta:
         verbose_name = 'Жанр произведения'
         verbose_name_plural = 'Жанры произведения'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'genre'],
+                name='unique_title_genre'
+            )
+        ]
+        # Обратный индекс для фильтра произведений по жанру.
+        indexes = [
+            models.Index(
+                fields=['genre', 'title'],
+                name='titlegenre_genre_title_idx'
+            )
+        ]
 
 
 class Review(AbstractReviewCommentModel):
@@ -138,6 +175,11 @@ class Review(AbstractReviewCommentModel):
         default_related_name = 'reviews'
         verbose_name = 'отзыв'
         verbose_name_plural = 'отзывы'
+        indexes = [
+            models.Index(fields=['title', '-id'], name='review_title_id_idx'),
+            # Отзывы за окно популярности для refresh_leaderboards.
+            models.Index(fields=['pub_date'], name='review_pub_date_idx'),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'title'],
@@ -145,6 +187,11 @@ class Review(AbstractReviewCommentModel):
             )
         ]
 
+    def save(self, *args, **kwargs):
+        # Пересчёт рейтинга в post_save выполняется в той же транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(AbstractReviewCommentModel):
     review = models.ForeignKey(
@@ -157,3 +204,109 @@ class Comment(AbstractReviewCommentModel):
         default_related_name = 'comments'
         verbose_name = 'комментарий'
         verbose_name_plural = 'комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', '-id'], name='comment_review_id_idx'
+            ),
+        ]
+
+
+class TitleScoreCount(models.Model):
+    """
+    Число отзывов с оценкой score на произведение. Обновляется
+    сигналами отзывов, пересчитывается командой rebuild_ratings.
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='score_counts',
+        verbose_name='Произведение'
+    )
+    score = models.PositiveSmallIntegerField(verbose_name='Оценка')
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+
+    class Meta:
+        verbose_name = 'Число оценок'
+        verbose_name_plural = 'Распределение оценок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'score'],
+                name='unique_title_score'
+            )
+        ]
+
+
+class Leaderboard(models.Model):
+    """
+    Места произведений, рассчитанные командой refresh_leaderboards.
+    scope — all, genre:<id> или category:<id>.
+    """
+    TOP = 'top'
+    TRENDING = 'trending'
+    BOARDS = (
+        (TOP, 'Лучшие'),
+        (TRENDING, 'Популярные сейчас'),
+    )
+
+    board = models.CharField(
+        max_length=16,
+        choices=BOARDS,
+        verbose_name='Рейтинг'
+    )
+    scope = models.CharField(max_length=32, verbose_name='Область')
+    refreshed_at = models.DateTimeField(verbose_name='Дата расчёта')
+
+    class Meta:
+        verbose_name = 'Рейтинг произведений'
+        verbose_name_plural = 'Рейтинги произведений'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'scope'],
+                name='unique_leaderboard_scope'
+            )
+        ]
+
+
+class LeaderboardEntry(models.Model):
+    leaderboard = models.ForeignKey(
+        Leaderboard,
+        on_delete=models.CASCADE,
+        related_name='entries',
+        verbose_name='Рейтинг'
+    )
+    position = models.PositiveIntegerField(verbose_name='Место')
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Произведение'
+    )
+    value = models.FloatField(verbose_name='Значение')
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтинге'
+        ordering = ('position',)
+        constraints = [
+            # Страница читается диапазоном мест по этому индексу.
+            models.UniqueConstraint(
+                fields=['leaderboard', 'position'],
+                name='unique_leaderboard_position'
+            )
+        ]
+
+
+class LeaderboardStaleScope(models.Model):
+    """
+    Область, из которой ушло произведение (смена жанра или категории,
+    удаление): по Title.updated её уже не найти, поэтому её
+    записывают сигналы, а refresh_leaderboards пересчитывает.
+    """
+    scope = models.CharField(max_length=32, verbose_name='Область')
+
+    class Meta:
+        verbose_name = 'Область к пересчёту рейтингов'
+        verbose_name_plural = 'Области к пересчёту рейтингов'
@@ -0,0 +1,112 @@
+"""
+Полнотекстовый поиск по произведениям.
+
+На PostgreSQL используется столбец reviews_title.search_vector
+(tsvector, заполняется триггером) с GIN-индексом и триграммный
+GIN-индекс по названию. На SQLite — таблица FTS5 reviews_title_fts,
+которая обновляется сигналами. Схема создаётся миграцией
+reviews.0003_title_search.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SEARCH_CONFIG = 'russian'
+
+FTS_TABLE = 'reviews_title_fts'
+
+WORD_RE = re.compile(r'\w+')
+
+
+def search_titles(queryset, query):
+    """
+    Отбирает произведения, подходящие под запрос, и сортирует
+    их по релевантности (аннотация search_rank).
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return _search_postgresql(queryset, query)
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, query)
+    return queryset.filter(name__icontains=query)
+
+
+def _search_postgresql(queryset, query):
+    table = queryset.model._meta.db_table
+    tsquery = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+    return queryset.extra(
+        select={
+            'search_rank': (
+                f'GREATEST(ts_rank({table}.search_vector, {tsquery}), '
+                f'word_similarity(%s, {table}.name))'
+            ),
+        },
+        select_params=(query, query),
+        where=(
+            f'({table}.search_vector @@ {tsquery} '
+            f'OR %s <%% {table}.name)',
+        ),
+        params=(query, query),
+        order_by=('-search_rank', '-id'),
+    )
+
+
+def _search_sqlite(queryset, query):
+    words = WORD_RE.findall(query)
+    if not words:
+        return queryset.none()
+    # Каждое слово ищется по префиксу: "крёст"* найдёт "Крёстный".
+    match = ' '.join('"{}"*'.format(word) for word in words)
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        select={'search_rank': f'-{FTS_TABLE}.rank'},
+        tables=(FTS_TABLE,),
+        where=(
+            f'{FTS_TABLE}.rowid = {table}.id',
+            f'{FTS_TABLE} MATCH %s',
+        ),
+        params=(match,),
+        order_by=('-search_rank', '-id'),
+    )
+
+
+def index_title(title, using=DEFAULT_DB_ALIAS):
+    """Обновляет запись произведения в индексе FTS5 (только SQLite)."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            (title.pk, title.name, title.description)
+        )
+
+
+def unindex_title(title_id, using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (title_id,)
+        )
+
+
+def rebuild_search_index(using=DEFAULT_DB_ALIAS):
+    """
+    Перестраивает индекс целиком, например после массовой загрузки,
+    которая обходит сигналы. На PostgreSQL индекс ведёт триггер.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'SELECT id, name, description FROM reviews_title'
+        )
@@ -0,0 +1,89 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .leaderboards import category_scope, genre_scope, mark_stale, title_scopes
+from .models import Category, Genre, Review, Title, TitleGenre
+from .search import index_title, unindex_title
+from .utils import change_score_count, update_title_rating
+
+
+@receiver(pre_save, sender=Review)
+def review_saving(sender, instance, update_fields=None, **kwargs):
+    # Прежняя оценка нужна, чтобы перенести отзыв между корзинами
+    # распределения оценок.
+    instance._previous_bucket = None
+    if instance.pk is None or (
+        update_fields is not None and 'score' not in update_fields
+    ):
+        return
+    instance._previous_bucket = Review.objects.filter(
+        pk=instance.pk
+    ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'score' not in update_fields:
+        return
+    previous = instance._previous_bucket
+    current = (instance.title_id, instance.score)
+    if previous != current:
+        if previous is not None:
+            change_score_count(*previous, -1)
+        change_score_count(*current, 1)
+    update_title_rating(instance.title_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    change_score_count(instance.title_id, instance.score, -1)
+    update_title_rating(instance.title_id)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields is not None and not {'name', 'description'} & set(
+        update_fields
+    ):
+        return
+    index_title(instance, using)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, using, **kwargs):
+    unindex_title(instance.pk, using)
+
+
+@receiver(pre_save, sender=Title)
+def title_saving(sender, instance, update_fields=None, **kwargs):
+    # Произведение уходит из рейтингов прежней категории.
+    if instance.pk is None or (
+        update_fields is not None and 'category' not in update_fields
+    ):
+        return
+    category_id = Title.objects.filter(pk=instance.pk).values_list(
+        'category_id', flat=True
+    ).first()
+    if category_id is not None and category_id != instance.category_id:
+        mark_stale([category_scope(category_id)])
+
+
+@receiver(pre_delete, sender=Title)
+def title_deleting(sender, instance, **kwargs):
+    mark_stale(title_scopes([instance.pk]))
+
+
+@receiver(post_delete, sender=TitleGenre)
+def title_genre_deleted(sender, instance, **kwargs):
+    mark_stale([genre_scope(instance.genre_id)])
+
+
+@receiver(pre_delete, sender=Genre)
+def genre_deleting(sender, instance, **kwargs):
+    mark_stale([genre_scope(instance.pk)])
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleting(sender, instance, **kwargs):
+    mark_stale([category_scope(instance.pk)])
@@ -0,0 +1,260 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from itertools import islice
+
+from api.cache import response_version
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from users.models import User
+
+from .leaderboards import (SCOPE_ALL, category_scope, genre_scope,
+                           refresh_leaderboards)
+from .models import (Category, Comment, Genre, Leaderboard, LeaderboardEntry,
+                     LeaderboardStaleScope, Review, Title, TitleGenre,
+                     TitleScoreCount)
+
+
+class TitleRatingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Фильм', year=2000)
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@ya.ru')
+            for i in range(3)
+        ]
+
+    def check_rating(self, rating, count):
+        self.title.refresh_from_db()
+        self.assertEqual(self.title.rating, rating)
+        self.assertEqual(self.title.reviews_count, count)
+
+    def test_rating_follows_reviews(self):
+        self.check_rating(None, 0)
+        first = Review.objects.create(
+            title=self.title, author=self.users[0], text='a', score=10)
+        Review.objects.create(
+            title=self.title, author=self.users[1], text='b', score=4)
+        self.check_rating(7, 2)
+        first.score = 2
+        first.save()
+        self.check_rating(3, 2)
+        first.delete()
+        self.check_rating(4, 1)
+
+    def test_rebuild_ratings(self):
+        Review.objects.create(
+            title=self.title, author=self.users[0], text='a', score=8)
+        Title.objects.update(rating=None, reviews_count=0)
+        call_command('rebuild_ratings', stdout=StringIO())
+        self.check_rating(8, 1)
+
+
+class ScoreCountTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Фильм', year=2000)
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@ya.ru')
+            for i in range(3)
+        ]
+
+    def counts(self):
+        return dict(
+            TitleScoreCount.objects.filter(
+                title=self.title, count__gt=0
+            ).values_list('score', 'count')
+        )
+
+    def test_counts_follow_reviews(self):
+        first = Review.objects.create(
+            title=self.title, author=self.users[0], text='a', score=10)
+        Review.objects.create(
+            title=self.title, author=self.users[1], text='b', score=10)
+        Review.objects.create(
+            title=self.title, author=self.users[2], text='c', score=4)
+        self.assertEqual(self.counts(), {10: 2, 4: 1})
+        first.score = 4
+        first.save()
+        self.assertEqual(self.counts(), {10: 1, 4: 2})
+        first.text = 'текст'
+        first.save(update_fields=['text'])
+        first.delete()
+        self.assertEqual(self.counts(), {10: 1, 4: 1})
+
+    def test_rebuild(self):
+        Review.objects.create(
+            title=self.title, author=self.users[0], text='a', score=8)
+        TitleScoreCount.objects.all().delete()
+        call_command('rebuild_ratings', stdout=StringIO())
+        self.assertEqual(self.counts(), {8: 1})
+
+
+@override_settings(LEADERBOARD_MIN_REVIEWS=1)
+class LeaderboardTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.genre = Genre.objects.create(name='Драма', slug='drama')
+        category = Category.objects.create(name='Фильм', slug='movie')
+        cls.first = Title.objects.create(
+            name='Первый', year=2000, category=category
+        )
+        cls.first.genre.set([cls.genre])
+        cls.second = Title.objects.create(name='Второй', year=2000)
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@ya.ru')
+            for i in range(2)
+        ]
+        for title, author, score in (
+            (cls.first, cls.users[0], 10),
+            (cls.first, cls.users[1], 10),
+            (cls.second, cls.users[0], 6),
+        ):
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score
+            )
+
+    def entries(self, board, scope=SCOPE_ALL):
+        return list(
+            Leaderboard.objects.get(board=board, scope=scope)
+            .entries.values_list('title_id', 'value')
+        )
+
+    def test_full_refresh(self):
+        self.assertEqual(refresh_leaderboards(timezone.now()), 6)
+        # Средний балл всех отзывов — 26 / 3.
+        mean = 26 / 3
+        top = self.entries(Leaderboard.TOP)
+        self.assertEqual(
+            [title_id for title_id, _ in top],
+            [self.first.pk, self.second.pk]
+        )
+        self.assertAlmostEqual(top[0][1], (2 * 10 + mean) / 3)
+        self.assertAlmostEqual(top[1][1], (6 + mean) / 2)
+        self.assertEqual(
+            self.entries(Leaderboard.TRENDING),
+            [(self.first.pk, 2), (self.second.pk, 1)]
+        )
+        self.assertEqual(
+            self.entries(Leaderboard.TRENDING, genre_scope(self.genre.pk)),
+            [(self.first.pk, 2)]
+        )
+
+    def test_incremental_refresh(self):
+        now = timezone.now()
+        Title.objects.update(updated=now - timedelta(hours=1))
+        Review.objects.update(pub_date=now - timedelta(hours=1))
+        refresh_leaderboards(now - timedelta(minutes=1))
+        self.assertEqual(refresh_leaderboards(now - timedelta(minutes=1)), 0)
+        Review.objects.create(
+            title=self.second, author=self.users[1], text='Отзыв', score=10
+        )
+        # Второе произведение есть только в области all.
+        self.assertEqual(refresh_leaderboards(timezone.now()), 2)
+        self.assertEqual(
+            self.entries(Leaderboard.TRENDING),
+            [(self.first.pk, 2), (self.second.pk, 2)]
+        )
+        # Все отзывы вышли из окна популярности.
+        refresh_leaderboards(timezone.now() + timedelta(days=8))
+        self.assertEqual(self.entries(Leaderboard.TRENDING), [])
+        self.assertEqual(
+            self.entries(Leaderboard.TRENDING, genre_scope(self.genre.pk)),
+            []
+        )
+
+    def test_stale_scopes(self):
+        now = timezone.now()
+        Title.objects.update(updated=now - timedelta(hours=1))
+        Review.objects.update(pub_date=now - timedelta(hours=1))
+        refresh_leaderboards(now - timedelta(minutes=1))
+        self.first.refresh_from_db()
+        category = self.first.category
+        self.first.category = None
+        self.first.save()
+        self.first.genre.clear()
+        self.second.delete()
+        refresh_leaderboards(timezone.now())
+        for scope in (genre_scope(self.genre.pk), category_scope(category.pk)):
+            self.assertEqual(self.entries(Leaderboard.TOP, scope), [])
+        self.assertEqual(
+            [title_id for title_id, _ in self.entries(Leaderboard.TOP)],
+            [self.first.pk]
+        )
+        self.assertFalse(LeaderboardStaleScope.objects.exists())
+        category.delete()
+        refresh_leaderboards(timezone.now())
+        self.assertFalse(
+            Leaderboard.objects.filter(
+                scope=category_scope(category.pk)
+            ).exists()
+        )
+
+    def test_command(self):
+        out = StringIO()
+        call_command('refresh_leaderboards', once=True, full=True, stdout=out)
+        self.assertIn('Пересчитано рейтингов: 6', out.getvalue())
+
+
+class ImportCsvTest(TestCase):
+
+    def test_import_static_data(self):
+        call_command('import_csv', batch_size=10, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Title.objects.count(), 32)
+        self.assertEqual(TitleGenre.objects.count(), 42)
+        self.assertEqual(Review.objects.count(), 72)
+        self.assertEqual(Comment.objects.count(), 3)
+        review = Review.objects.get(pk=1)
+        self.assertEqual(review.pub_date.year, 2019)
+        title = Title.objects.get(pk=review.title_id)
+        self.assertEqual(title.reviews_count, title.reviews.count())
+        self.assertEqual(
+            sum(title.score_counts.values_list('count', flat=True)),
+            title.reviews_count
+        )
+
+    def test_clear_after_leaderboards(self):
+        call_command('import_csv', stdout=StringIO())
+        refresh_leaderboards(timezone.now())
+        call_command('import_csv', clear=True, stdout=StringIO())
+        self.assertFalse(LeaderboardEntry.objects.exists())
+        self.assertFalse(Leaderboard.objects.exists())
+        self.assertEqual(Title.objects.count(), 32)
+
+    def test_resume_after_lost_checkpoint(self):
+        path = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        call_command('import_csv', batch_size=10, stdout=StringIO())
+        # Обрыв после записи пакета, но до контрольной точки:
+        # первые 10 отзывов есть в базе, а точка указывает на начало.
+        with open(os.path.join(
+            settings.BASE_DIR, 'static', 'data', 'review.csv'
+        ), encoding='utf-8') as file:
+            loaded = [row['id'] for row in islice(csv.DictReader(file), 10)]
+        Review.objects.exclude(pk__in=loaded).delete()
+        Comment.objects.all().delete()
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'users.csv': True, 'genre.csv': True,
+                       'category.csv': True, 'titles.csv': True,
+                       'genre_title.csv': True, 'review.csv': 0}, file)
+        call_command(
+            'import_csv', batch_size=10, checkpoint=path, stdout=StringIO()
+        )
+        self.assertEqual(Review.objects.count(), 72)
+        self.assertEqual(Comment.objects.count(), 3)
+
+    def test_import_invalidates_api_cache(self):
+        versions = [response_version('titles'), response_version('reviews', 1)]
+        call_command('import_csv', stdout=StringIO())
+        self.assertNotEqual(response_version('titles'), versions[0])
+        self.assertNotEqual(response_version('reviews', 1), versions[1])
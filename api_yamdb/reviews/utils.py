@@ -0,0 +1,101 @@
+from django.db import (DEFAULT_DB_ALIAS, IntegrityError, connections,
+                       transaction)
+from django.db.models import Avg, Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+
+from .models import Review, Title, TitleScoreCount
+
+SCORES = range(1, 11)
+
+
+def title_rating_subqueries(title_ref):
+    """Подзапросы среднего балла и числа отзывов для произведения."""
+    reviews = Review.objects.filter(title=title_ref).order_by().values('title')
+    return {
+        'rating': Subquery(
+            reviews.annotate(value=Avg('score')).values('value')[:1]
+        ),
+        'reviews_count': Coalesce(
+            Subquery(
+                reviews.annotate(value=Count('pk')).values('value')[:1],
+                output_field=IntegerField()
+            ),
+            0
+        ),
+    }
+
+
+def update_title_rating(title_id):
+    """
+    Пересчитывает рейтинг одного произведения.
+    Строка произведения блокируется, чтобы параллельные отзывы
+    не затёрли результат друг друга.
+    """
+    titles = Title.objects.filter(pk=title_id)
+    list(titles.select_for_update().values_list('pk', flat=True))
+    titles.update(updated=Now(), **title_rating_subqueries(title_id))
+
+
+def rebuild_title_ratings(using=DEFAULT_DB_ALIAS):
+    """Пересчитывает рейтинги всех произведений одним запросом."""
+    return Title.objects.using(using).update(
+        updated=Now(), **title_rating_subqueries(OuterRef('pk'))
+    )
+
+
+def change_score_count(title_id, score, delta):
+    """Изменяет на delta число отзывов с оценкой score."""
+    if score is None or not delta:
+        return
+    counts = TitleScoreCount.objects.filter(title_id=title_id, score=score)
+    if counts.update(count=F('count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            TitleScoreCount.objects.create(
+                title_id=title_id, score=score, count=delta
+            )
+    except IntegrityError:
+        # Строку только что создал параллельный запрос.
+        counts.update(count=F('count') + delta)
+
+
+def rebuild_score_counts(using=DEFAULT_DB_ALIAS):
+    """
+    Пересчитывает распределение оценок всех произведений одним
+    запросом INSERT ... SELECT.
+    """
+    quote_name = connections[using].ops.quote_name
+    TitleScoreCount.objects.using(using).all().delete()
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {} (title_id, score, count) '
+            'SELECT title_id, score, COUNT(*) FROM {} '
+            'WHERE score IS NOT NULL GROUP BY title_id, score'.format(
+                quote_name(TitleScoreCount._meta.db_table),
+                quote_name(Review._meta.db_table)
+            )
+        )
+        return cursor.rowcount
+
+
+def title_rating_stats(title_id):
+    """
+    Число отзывов по оценкам, всего и средняя оценка или None,
+    если произведения нет.
+    """
+    counts = dict(
+        TitleScoreCount.objects.filter(title_id=title_id).values_list(
+            'score', 'count'
+        )
+    )
+    if not counts and not Title.objects.filter(pk=title_id).exists():
+        return None
+    total = sum(counts.values())
+    return {
+        'scores': {str(score): counts.get(score, 0) for score in SCORES},
+        'total': total,
+        'mean': round(
+            sum(score * count for score, count in counts.items()) / total, 2
+        ) if total else None,
+    }
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import User
+from .models import OutboxEmail, User
 
 
 class CustomUserAdmin(UserAdmin):
@@ -26,4 +26,15 @@ class CustomUserAdmin(UserAdmin):
     empty_value_display = '-пусто-'
 
 
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'recipient', 'subject', 'created',
+        'attempts', 'next_attempt', 'sent'
+    )
+    list_filter = ('sent',)
+    search_fields = ('recipient',)
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(User, CustomUserAdmin)
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
@@ -0,0 +1,101 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from users.models import OutboxEmail
+
+from api_yamdb.settings import (OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS,
+                                OUTBOX_POLL_INTERVAL, OUTBOX_RETRY_DELAY)
+
+# Время, на которое выбранные письма скрываются от других воркеров.
+LEASE = timedelta(minutes=5)
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди пакетами через одно '
+        'SMTP-соединение, неудачные отправки повторяются с задержкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать очередь один раз и завершиться.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=OUTBOX_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        connection = get_connection()
+        try:
+            while True:
+                sent, failed = self.process_batch(
+                    connection, options['batch_size']
+                )
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено: {sent}, ошибок: {failed}'
+                    )
+                    continue
+                if options['once']:
+                    break
+                time.sleep(OUTBOX_POLL_INTERVAL)
+        finally:
+            connection.close()
+
+    def claim_batch(self, batch_size):
+        """Забирает пакет писем, не пересекаясь с другими воркерами."""
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                OutboxEmail.objects.select_for_update(skip_locked=True)
+                .filter(
+                    sent__isnull=True,
+                    next_attempt__lte=now,
+                    attempts__lt=OUTBOX_MAX_ATTEMPTS
+                )
+                .order_by('next_attempt')[:batch_size]
+            )
+            OutboxEmail.objects.filter(
+                pk__in=[email.pk for email in emails]
+            ).update(next_attempt=now + LEASE)
+        return emails
+
+    def process_batch(self, connection, batch_size):
+        emails = self.claim_batch(batch_size)
+        sent = failed = 0
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email,
+                [email.recipient], connection=connection
+            )
+            try:
+                # Соединение открывается один раз и переиспользуется.
+                connection.open()
+                message.send()
+            except Exception as error:
+                failed += 1
+                self.schedule_retry(email, error)
+                # После ошибки соединение может быть разорвано.
+                connection.close()
+            else:
+                sent += 1
+                OutboxEmail.objects.filter(pk=email.pk).update(
+                    sent=timezone.now(), attempts=email.attempts + 1
+                )
+        return sent, failed
+
+    def schedule_retry(self, email, error):
+        # После OUTBOX_MAX_ATTEMPTS попыток письмо больше не выбирается,
+        # но остаётся в таблице для разбора.
+        OutboxEmail.objects.filter(pk=email.pk).update(
+            attempts=email.attempts + 1,
+            next_attempt=timezone.now() + timedelta(
+                seconds=OUTBOX_RETRY_DELAY * 2 ** email.attempts
+            ),
+            last_error=str(error),
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outbox_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='confirmation_nonce',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Счётчик кодов подтверждения'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from api.validators import validate_username
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 from api_yamdb.settings import (AUTH_CONF_CODE_MAXLENGTH, AUTH_EMAIL_MAXLENGTH,
                                 AUTH_USERNAME_MAXLENGTH)
@@ -46,6 +47,13 @@ class User(AbstractUser):
         null=True,
         verbose_name='Код подтверждения'
     )
+    # Входит в подписанный код и растёт при каждом обмене кода на токен,
+    # поэтому код нельзя использовать дважды.
+    confirmation_nonce = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Счётчик кодов подтверждения'
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -64,3 +72,46 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class OutboxEmail(models.Model):
+    """Письмо, ожидающее отправки командой send_outbox."""
+
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(
+        max_length=AUTH_EMAIL_MAXLENGTH, verbose_name='Отправитель'
+    )
+    recipient = models.EmailField(
+        max_length=AUTH_EMAIL_MAXLENGTH, verbose_name='Получатель'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата создания'
+    )
+    next_attempt = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Число попыток'
+    )
+    sent = models.DateTimeField(
+        null=True, blank=True, verbose_name='Дата отправки'
+    )
+    last_error = models.TextField(
+        blank=True, verbose_name='Последняя ошибка'
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt',)
+        indexes = [
+            models.Index(
+                fields=['sent', 'next_attempt'],
+                name='outbox_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,120 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from api.throttling import local_buckets
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import OutboxEmail, User
+
+
+class OutboxTest(TestCase):
+
+    def setUp(self):
+        local_buckets.clear()
+
+    def signup(self):
+        return self.client.post(
+            reverse('signup'),
+            {'username': 'reader', 'email': 'reader@ya.ru'}
+        )
+
+    def test_signup_queues_email(self):
+        self.assertEqual(self.signup().status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipient, 'reader@ya.ru')
+        code = User.objects.get(username='reader').confirmation_code
+        self.assertIn(code, email.body)
+
+    def test_worker_sends_queued_emails(self):
+        self.signup()
+        call_command('send_outbox', once=True, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIsNotNone(OutboxEmail.objects.get().sent)
+
+    def test_worker_retries_failed_emails(self):
+        self.signup()
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=OSError('smtp down')
+        ):
+            call_command('send_outbox', once=True, stdout=StringIO())
+        email = OutboxEmail.objects.get()
+        self.assertIsNone(email.sent)
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, 'smtp down')
+        self.assertGreater(email.next_attempt, email.created)
+
+
+class ConfirmationCodeTest(TestCase):
+
+    def setUp(self):
+        local_buckets.clear()
+        self.client.post(
+            reverse('signup'),
+            {'username': 'reader', 'email': 'reader@ya.ru'}
+        )
+        self.user = User.objects.get(username='reader')
+
+    def sent_code(self):
+        body = OutboxEmail.objects.latest('pk').body
+        return body.rsplit(' ', 1)[1].rstrip('.')
+
+    def get_token(self, code):
+        return self.client.post(
+            reverse('token'),
+            {'username': 'reader', 'confirmation_code': code}
+        )
+
+    def test_legacy_code(self):
+        code = self.sent_code()
+        self.assertEqual(len(code), 5)
+        self.assertEqual(self.user.confirmation_code, code)
+        self.assertEqual(self.get_token(code).status_code, 200)
+        self.assertEqual(self.get_token(code).status_code, 400)
+
+    @override_settings(AUTH_CONF_CODE_MODE='signed')
+    def test_signed_code(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(
+                reverse('signup'),
+                {'username': 'reader', 'email': 'reader@ya.ru'}
+            )
+        self.assertFalse([
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "users_user"')
+        ])
+        code = self.sent_code()
+        self.assertEqual(len(code), 8)
+        # Один SELECT пользователя и одно UPDATE счётчика кодов.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get_token(code).status_code, 200)
+        self.assertEqual(self.get_token(code).status_code, 400)
+        # Код, выданный в режиме legacy, по-прежнему принимается.
+        self.client.post(
+            reverse('signup'),
+            {'username': 'reader', 'email': 'reader@ya.ru'}
+        )
+        User.objects.filter(pk=self.user.pk).update(confirmation_code='abcde')
+        self.assertEqual(self.get_token('abcde').status_code, 200)
+
+    @override_settings(AUTH_CONF_CODE_MODE='signed', AUTH_CONF_CODE_TTL=60)
+    def test_signed_code_expires(self):
+        now = time.time()
+        start = now - now % 60
+        with mock.patch('time.time', return_value=start + 10):
+            self.client.post(
+                reverse('signup'),
+                {'username': 'reader', 'email': 'reader@ya.ru'}
+            )
+        code = self.sent_code()
+        with mock.patch('time.time', return_value=start + 130):
+            self.assertEqual(self.get_token(code).status_code, 400)
+        with mock.patch('time.time', return_value=start + 110):
+            self.assertEqual(self.get_token(code).status_code, 200)